@@ -0,0 +1,132 @@
+"""Time a cold start of the app and the first interactions after it
+
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --repeat 10
+
+Each run starts a fresh Python process, so nothing is imported or loaded yet,
+and reports the median over --repeat processes:
+
+  imports      the app's own imports (Streamlit itself excluded), on their own
+  first page   the first script run through Streamlit's AppTest harness, as a
+               first visitor sees it (the app's imports included)
+  next page    a rerun of the same page
+  first upload an uploaded photo checked against earlier scans
+  first scan   OCR and parsing of one receipt photo, in the same process
+  next scan    a second, different receipt
+
+Scans are skipped when Tesseract can't run. Every run gets its own empty
+databases and OCR cache, so nothing is read back from an earlier run. The
+FoodKeeper artifact is compiled afresh too, on the warm-up thread, as on a
+new install.
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '..', 'src')
+
+STEPS = ['imports', 'first page', 'next page', 'first upload', 'first scan', 'next scan']
+
+# Writable app state, pointed at a temporary directory for each run
+DATA_SETTINGS = {
+    'PANTRY_DB_PATH': 'pantry.db',
+    'PANTRY_ALIAS_DB': 'aliases.db',
+    'PANTRY_SCAN_JOBS_DB': 'scan_jobs.db',
+    'PANTRY_SCAN_HISTORY_DB': 'scan_history.db',
+    'PANTRY_OCR_CACHE_DIR': 'ocr_cache',
+    'PANTRY_OUTBOX_DIR': 'outbox',
+    'PANTRY_FOODKEEPER_DB': 'foodkeeper.db',
+    'PANTRY_PROFILE_DIR': 'profiles',
+}
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def receipt_upload(seed):
+    from corpus import receipt_lines, render_receipt
+    from pantry.uploads import Upload
+
+    buffer = io.BytesIO()
+    render_receipt(receipt_lines(15, seed=seed), font_size=110).save(buffer, format='JPEG', quality=90)
+    return Upload(buffer.getvalue(), f"receipt-{seed}.jpg")
+
+def time_imports():
+    """Child process: the imports of app.py below its Streamlit import, on their own"""
+    import streamlit  # noqa: F401
+    sys.path.insert(0, SRC_DIR)
+    with open(os.path.join(SRC_DIR, 'app.py'), encoding='utf-8') as f:
+        source = f.read()
+    imports = source[source.index('\nfrom pantry import'):source.index('\nfrom item_editor import')]
+    return {'imports': timed(lambda: exec(imports, {}))}
+
+def time_session():
+    """Child process: the first page, an upload and two scans, each timed once"""
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    app = AppTest.from_file(os.path.join(SRC_DIR, 'app.py'), default_timeout=60)
+    results['first page'] = timed(app.run)
+    results['next page'] = timed(app.run)
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+
+    sys.path[:0] = [SRC_DIR, BENCH_DIR]
+    from pantry import DuplicateIndex, scan_receipts
+
+    index = DuplicateIndex(os.environ['PANTRY_SCAN_HISTORY_DB'])
+    uploads = [receipt_upload(seed) for seed in (1, 2)]
+    results['first upload'] = timed(lambda: index.find('receipt', uploads[:1]))
+
+    try:
+        for step, upload in zip(['first scan', 'next scan'], uploads):
+            results[step] = timed(lambda: list(scan_receipts([upload], {})))
+    except Exception as e:  # no Tesseract here
+        results['skipped'] = str(e)
+    return results
+
+CHILDREN = {'imports': time_imports, 'session': time_session}
+
+def run_child(child, data_dir):
+    env = dict(os.environ)
+    env.update({name: os.path.join(data_dir, path) for name, path in DATA_SETTINGS.items()})
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', child], env=env,
+                          capture_output=True, text=True)
+    if proc.returncode:
+        sys.exit(proc.stderr)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start and first-interaction latency")
+    parser.add_argument('--repeat', type=int, default=5, help="fresh processes to take the median over")
+    parser.add_argument('--child', choices=sorted(CHILDREN), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        print(json.dumps(CHILDREN[args.child]()))
+        return
+
+    runs = []
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as data_dir:
+            run = run_child('imports', data_dir)
+            run.update(run_child('session', data_dir))
+        runs.append(run)
+
+    print(f"median of {args.repeat} fresh processes")
+    for step in STEPS:
+        timings = [run[step] for run in runs if step in run]
+        if timings:
+            print(f"  {step:<12} {statistics.median(timings) * 1000:8.1f} ms")
+        else:
+            print(f"  {step:<12}  skipped: {runs[0].get('skipped')}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Compare full and adaptive OCR on timing and parsed-item accuracy
+
+    python benchmarks/compare_ocr_modes.py
+    python benchmarks/compare_ocr_modes.py --samples 10 --engine tesserocr
+
+Synthetic receipt photos and Walmart screenshots know their own items, so
+accuracy is the share of those items each mode's text parses back to (same
+price, nearly the same name). Every sample is also read with a few lines
+blurred, like a smudged or creased receipt. Needs Tesseract.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from PIL import ImageFilter
+
+from corpus import receipt_lines, render_receipt, render_screenshot, walmart_lines
+from pantry import StageTimer, make_ocr_engine, ocr_image, parse_receipt, parse_walmart_order
+from pantry.config import OCR_ENGINE
+from pantry.parsing import receipt_line_ok, walmart_line_ok
+from pantry.uploads import Upload
+
+MODES = ['full', 'adaptive']
+
+def smudge(image, seed, count=8):
+    """Blur a few random strips, like smudges and creases across some lines"""
+    rng = random.Random(seed)
+    image = image.copy()
+    width, height = image.width * 3 // 10, image.height // 30
+    for _ in range(count):
+        x = rng.randint(0, image.width - width)
+        y = rng.randint(0, image.height - height)
+        strip = image.crop((x, y, x + width, y + height))
+        radius = rng.uniform(2, 4) * image.width / 1200
+        image.paste(strip.filter(ImageFilter.GaussianBlur(radius)), (x, y))
+    return image
+
+def walmart_truth(lines):
+    """Products of walmart_lines(): a name with its price at the end of the line or on the next"""
+    items = []
+    for idx, line in enumerate(lines):
+        if not line.startswith('Great Value'):
+            continue
+        name, _, price = line.partition(' $')
+        if not price:
+            price = lines[idx + 1].lstrip('$')
+        items.append({'name': name, 'price': float(price)})
+    return items
+
+def samples(count):
+    """(kind, name, image, true items) - each sample clean and smudged"""
+    for idx in range(count):
+        lines = receipt_lines(20, seed=idx)
+        # Large enough type that the receipt fills the photo, as it would on a phone
+        photo = render_receipt(lines, angle=(idx % 5) - 2, font_size=110)
+        truth = parse_receipt('\n'.join(lines))[0]
+        yield 'receipt', f"receipt-{idx}", photo, truth
+        yield 'receipt', f"receipt-{idx}-smudged", smudge(photo, idx), truth
+
+        # Few enough items that every row fits on one screen
+        lines = walmart_lines(8, seed=idx)
+        shot = render_screenshot(lines, chrome=True)
+        truth = walmart_truth(lines)
+        yield 'walmart', f"walmart-{idx}", shot, truth
+        yield 'walmart', f"walmart-{idx}-smudged", smudge(shot, idx), truth
+
+def _key(name):
+    return ''.join(name.lower().split())
+
+def matched(items, truth, min_ratio=0.8):
+    """How many true items were parsed back with the same price and a close name ("0z" for "oz" is fine)"""
+    remaining = list(truth)
+    hits = 0
+    for item in items:
+        for true_item in remaining:
+            if (round(true_item['price'], 2) == round(item['price'], 2) and
+                    SequenceMatcher(None, _key(true_item['name']), _key(item['name'])).ratio() >= min_ratio):
+                remaining.remove(true_item)
+                hits += 1
+                break
+    return hits
+
+def as_upload(image):
+    """PNG upload, as the app receives it"""
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return Upload(buffer.getvalue(), 'sample.png')
+
+def read(kind, upload, mode, engine, timer):
+    if kind == 'receipt':
+        text = ocr_image(upload, preprocess=True, timer=timer, engine=engine, mode=mode,
+                         line_ok=receipt_line_ok)
+        return parse_receipt(text)[0]
+    text = ocr_image(upload, preprocess=False, roi=True, timer=timer, engine=engine, mode=mode,
+                     line_ok=walmart_line_ok)
+    return parse_walmart_order([text])[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=5, help="receipts and screenshots of each kind")
+    parser.add_argument('--engine', choices=['auto', 'tesserocr', 'tesserocr-process', 'subprocess'],
+                        default=OCR_ENGINE, help="warm Tesseract workers (in-process or in worker processes) "
+                                                 "or one tesseract process per image")
+    parser.add_argument('--tesseract-cmd', help="path to the tesseract binary")
+    args = parser.parse_args(argv)
+
+    engine = make_ocr_engine(args.engine, cmd=args.tesseract_cmd)
+    results = {}
+    try:
+        for kind, name, image, truth in samples(args.samples):
+            variant = 'smudged' if name.endswith('smudged') else 'clean'
+            upload = as_upload(image)
+            row = [f"{name:<20}"]
+            for mode in MODES:
+                timer = StageTimer()
+                start = time.perf_counter()
+                items = read(kind, upload, mode, engine, timer)
+                # Both modes decode the same PNG; only OCR and parsing are compared
+                seconds = time.perf_counter() - start - timer.totals.get('decode', 0.0)
+                hits = matched(items, truth)
+
+                stats = results.setdefault((kind, variant, mode), {'seconds': 0.0, 'hits': 0, 'items': 0,
+                                                                   'lines': 0, 'retried': 0})
+                stats['seconds'] += seconds
+                stats['hits'] += hits
+                stats['items'] += len(truth)
+                stats['lines'] += timer.counters.get('ocr_lines', 0)
+                stats['retried'] += timer.counters.get('lines_retried', 0)
+                row.append(f"{mode} {seconds * 1000:7.1f} ms {hits:>2}/{len(truth)}")
+            print('  '.join(row))
+    finally:
+        engine.close()
+
+    print()
+    for (kind, variant, mode), stats in results.items():
+        line = (f"{kind:<8} {variant:<8} {mode:<9} ocr {stats['seconds']:6.2f}s  "
+                f"items {stats['hits']}/{stats['items']}")
+        if stats['lines']:
+            line += f"  lines re-read {stats['retried']}/{stats['lines']}"
+        print(line)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Compare the PIL and NumPy preprocessing engines on timing and OCR accuracy
+
+    python benchmarks/compare_preprocessing.py              # synthetic phone photos
+    python benchmarks/compare_preprocessing.py photos/      # real photos with .txt transcripts
+
+Accuracy is the similarity between Tesseract's text and the known transcript
+(synthetic receipts know their own text; real photos need a sidecar
+`<image>.txt`). Without tesserocr or a Tesseract binary only timings are
+reported.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from PIL import Image
+
+from corpus import receipt_lines, render_receipt
+from pantry import make_ocr_engine, parse_receipt
+from pantry.config import OCR_ENGINE
+from pantry.engine import resolve_engine
+from pantry.preprocess import PREPROCESS_SETTINGS, preprocess_image_numpy, preprocess_image_pil
+from pantry.tesseract import TesseractNotFound, find_tesseract
+
+ENGINES = [('pil', preprocess_image_pil), ('numpy', preprocess_image_numpy)]
+
+def synthetic_samples(count):
+    for idx in range(count):
+        lines = receipt_lines(25, seed=idx)
+        yield f"synthetic-{idx}", render_receipt(lines, angle=(idx % 5) - 2), '\n'.join(lines)
+
+def folder_samples(directory):
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(('.png', '.jpg', '.jpeg')):
+            continue
+        path = os.path.join(directory, name)
+        truth_path = os.path.splitext(path)[0] + '.txt'
+        truth = None
+        if os.path.exists(truth_path):
+            with open(truth_path, encoding='utf-8') as f:
+                truth = f.read()
+        image = Image.open(path)
+        image.load()
+        yield name, image, truth
+
+def tesseract_available(engine_name, cmd=None):
+    """Whether the OCR engine make_ocr_engine picks can run: tesserocr, or a tesseract binary it finds"""
+    if resolve_engine(engine_name) != 'subprocess':
+        return True
+    try:
+        find_tesseract(cmd)
+        return True
+    except TesseractNotFound:
+        return False
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', nargs='?', help="photos with optional .txt transcripts")
+    parser.add_argument('--samples', type=int, default=5, help="synthetic photos when no directory is given")
+    parser.add_argument('--engine', choices=['auto', 'tesserocr', 'tesserocr-process', 'subprocess'],
+                        default=OCR_ENGINE, help="OCR engine reading both engines' output")
+    parser.add_argument('--tesseract-cmd', help="path to the tesseract binary")
+    args = parser.parse_args(argv)
+
+    ocr = None
+    if tesseract_available(args.engine, args.tesseract_cmd):
+        ocr = make_ocr_engine(args.engine, cmd=args.tesseract_cmd)
+    else:
+        print("Tesseract not found - reporting preprocessing timings only\n")
+
+    samples = folder_samples(args.directory) if args.directory else synthetic_samples(args.samples)
+    results = {name: {'prep': [], 'ocr': [], 'accuracy': [], 'items': []} for name, _ in ENGINES}
+
+    for sample_name, image, truth in samples:
+        row = [f"{sample_name:<20}"]
+        for engine_name, engine in ENGINES:
+            start = time.perf_counter()
+            processed = engine(image, PREPROCESS_SETTINGS)
+            prep_seconds = time.perf_counter() - start
+            results[engine_name]['prep'].append(prep_seconds)
+            row.append(f"{engine_name} {prep_seconds * 1000:7.1f} ms {processed.width}x{processed.height}")
+
+            if ocr is not None:
+                start = time.perf_counter()
+                text = ocr.image_to_string(processed)
+                results[engine_name]['ocr'].append(time.perf_counter() - start)
+                results[engine_name]['items'].append(len(parse_receipt(text)[0]))
+                if truth is not None:
+                    results[engine_name]['accuracy'].append(SequenceMatcher(None, truth, text).ratio())
+        print('  '.join(row))
+    if ocr is not None:
+        ocr.close()
+
+    print()
+    for engine_name, _ in ENGINES:
+        stats = results[engine_name]
+        if not stats['prep']:
+            continue
+        line = f"{engine_name:<6} preprocess median {statistics.median(stats['prep']) * 1000:7.1f} ms"
+        if stats['ocr']:
+            line += f"  ocr median {statistics.median(stats['ocr']) * 1000:7.1f} ms"
+            line += f"  items {sum(stats['items'])}"
+        if stats['accuracy']:
+            line += f"  text accuracy {statistics.mean(stats['accuracy']):.3f}"
+        print(line)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Synthetic receipt corpora for benchmarks - deterministic for a given seed"""
+import random
+
+from PIL import Image, ImageDraw, ImageFont
+
+PRODUCE = ['GREEN PEPPER', 'BANANAS', 'ROMA TOMATO', 'RED ONION', 'GALA APPLE', 'BABY SPINACH',
+           'RUSSET POTATO', 'CARROTS', 'PANEER', 'TOOR DAL', 'WHOLE MILK', 'LARGE EGGS',
+           'WHEAT BREAD', 'GREEK YOGURT', 'CHEDDAR CHEESE', 'BASMATI RICE', 'CHICKEN BREAST']
+
+def receipt_lines(count, seed=0):
+    """Physical receipt lines in the formats parse_receipt understands, plus noise"""
+    rng = random.Random(seed)
+    lines = ['WALMART SUPERCENTER', 'REGISTER 4  CASHIER ANN']
+    for _ in range(count):
+        name = rng.choice(PRODUCE)
+        qty = rng.randint(1, 3)
+        unit = rng.randint(50, 999) / 100
+        total = qty * unit
+        style = rng.random()
+        if style < 0.6:
+            lines.append(f"{name}    {qty}.00 @ {unit:.2f}  {total:.2f} N")
+        elif style < 0.8:
+            lines.append(name)
+            lines.append(f"{qty}@ {round(total * 100)} N")
+        else:
+            lines.append(name)
+            lines.append(f"{qty}.00 @ {round(unit * 100)}  {round(total * 100)}N")
+        if rng.random() < 0.1:
+            lines.append(f"YOU SAVED {rng.randint(10, 99) / 100:.2f}")
+    lines += ['SUBTOTAL 45.67', 'TAX 1.23', 'TOTAL 46.90', 'VISA ENDING IN 1234']
+    return lines
+
+def walmart_lines(count, seed=0):
+    """Walmart app screenshot text: item/price rows, qty and unit lines, UI chrome"""
+    rng = random.Random(seed)
+    lines = ['Delivered', 'Items received', 'Track order']
+    for _ in range(count):
+        name = f"Great Value {rng.choice(PRODUCE).title()}, {rng.randint(8, 64)} oz"
+        price = rng.randint(50, 2999) / 100
+        if rng.random() < 0.7:
+            lines.append(f"{name} ${price:.2f}")
+        else:
+            lines.append(name)
+            lines.append(f"${price:.2f}")
+        if rng.random() < 0.5:
+            lines.append(f"${rng.randint(10, 99) / 100:.2f}/lb")
+        lines.append(f"Qty {rng.randint(1, 4)}")
+        if rng.random() < 0.1:
+            lines.append('Sponsored')
+    lines += ['Subtotal $45.67', 'Driver tip $5.00', 'Tax $1.23', 'Total $51.90', 'Payment method']
+    return lines
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single bitmap font
+        return ImageFont.load_default()
+
+def render_receipt(lines, angle=0.0, frame=(3024, 4032), background=60, font_size=40):
+    """Receipt paper with text, rotated by angle and laid on a darker table like a phone photo"""
+    line_height = int(font_size * 1.3)
+    paper = Image.new('L', (font_size * 26, 60 + len(lines) * line_height), 245)
+    draw = ImageDraw.Draw(paper)
+    font = _font(font_size)
+    for idx, line in enumerate(lines):
+        draw.text((font_size, 30 + idx * line_height), line, fill=20, font=font)
+
+    if angle:
+        paper = paper.rotate(angle, expand=True, fillcolor=background, resample=Image.BICUBIC)
+    if frame is None:
+        return paper.convert('RGB')
+
+    # Scale down to fit the frame, like a photo of a long receipt
+    fit = min(1.0, 0.9 * frame[0] / paper.width, 0.9 * frame[1] / paper.height)
+    if fit < 1.0:
+        paper = paper.resize((int(paper.width * fit), int(paper.height * fit)), Image.LANCZOS)
+    photo = Image.new('L', frame, background)
+    photo.paste(paper, ((frame[0] - paper.width) // 2, (frame[1] - paper.height) // 2))
+    return photo.convert('RGB')
+
+def render_screenshot(lines, size=(1170, 2532), font_size=42, chrome=False):
+    """Phone screenshot: white background, dark text, no skew
+
+    With chrome, also a status bar, product thumbnails beside item names and
+    filled buttons - the parts of the real app that aren't item rows.
+    """
+    image = Image.new('L', size, 255)
+    draw = ImageDraw.Draw(image)
+    font = _font(font_size)
+    line_height = int(font_size * 1.6)
+    left = 48
+    if chrome:
+        draw.text((48, 20), "9:41", fill=0, font=font)
+        draw.rectangle((size[0] - 140, 28, size[0] - 60, 58), fill=0)
+        left = 48 + 4 * font_size
+    for idx, line in enumerate(lines[: (size[1] - 120) // line_height]):
+        y = 120 + idx * line_height
+        if chrome and line in ('Track order', 'Payment method'):
+            draw.rounded_rectangle((left - 16, y - 8, size[0] - 48, y + line_height - 16),
+                                   radius=20, fill=40)
+            draw.text((left, y), line, fill=255, font=font)
+            continue
+        if chrome and line.startswith('Great Value'):
+            draw.rectangle((48, y, 48 + 3 * font_size, y + 3 * font_size), fill=150)
+        draw.text((left, y), line, fill=30, font=font)
+    return image.convert('RGB')
@@ -0,0 +1,97 @@
+"""Time a Step 1 keystroke before and after fragment-level reruns
+
+    python benchmarks/editor_rerun.py
+    python benchmarks/editor_rerun.py --items 500 --repeat 20
+
+Before: every edit reran the whole page, so every row was rebuilt. After:
+only the edited row's fragment reruns, and the summary (subtotal, tax, Next)
+picks the edit up by rerunning on its own once a second. That polling is an
+idle cost every open Step 1 session pays, so one summary rerun is timed too.
+All are timed as script runs through Streamlit's AppTest harness, which
+includes widget serialization.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from streamlit.testing.v1 import AppTest
+
+def render_rows(src_dir, item_count, only_first):
+    """Script body run by AppTest - all rows, or just the row being edited"""
+    import sys
+    sys.path.insert(0, src_dir)
+
+    import streamlit as st
+    from item_editor import ItemEditor, edit_item_row
+
+    if 'item_editor' not in st.session_state:
+        st.session_state.item_editor = ItemEditor(
+            {'name': f"ITEM {idx}", 'qty': 1, 'price': 1.99} for idx in range(item_count)
+        )
+    row_ids = list(st.session_state.item_editor.rows)
+    for row_id in row_ids[:1] if only_first else row_ids:
+        edit_item_row(row_id)
+
+def render_summary(src_dir, item_count):
+    """Script body run by AppTest - just the subtotal, tax and Next button"""
+    import sys
+    sys.path.insert(0, src_dir)
+
+    import streamlit as st
+    from item_editor import ItemEditor, editor_summary
+
+    if 'item_editor' not in st.session_state:
+        st.session_state.item_editor = ItemEditor(
+            {'name': f"ITEM {idx}", 'qty': 1, 'price': 1.99} for idx in range(item_count)
+        )
+        st.session_state.totals = {'tax': '$1.00'}
+    editor_summary(lambda items: None)
+
+def time_summary(item_count, repeat):
+    app = AppTest.from_function(render_summary, args=(SRC_DIR, item_count), default_timeout=60)
+    app.run()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - started)
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return statistics.median(timings)
+
+def time_runs(item_count, only_first, repeat):
+    app = AppTest.from_function(render_rows, args=(SRC_DIR, item_count, only_first), default_timeout=60)
+    app.run()
+    timings = []
+    for idx in range(repeat):
+        app.text_input(key='name_0').input(f"EDITED {idx}")
+        started = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - started)
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return statistics.median(timings)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Step 1 rerun cost, full page vs one fragment")
+    parser.add_argument('--items', type=int, default=200, help="rows in the editor")
+    parser.add_argument('--repeat', type=int, default=10, help="keystrokes timed per mode")
+    args = parser.parse_args(argv)
+
+    before = time_runs(args.items, only_first=False, repeat=args.repeat)
+    after = time_runs(args.items, only_first=True, repeat=args.repeat)
+    summary = time_summary(args.items, args.repeat)
+
+    print(f"{args.items} items, median of {args.repeat} edits")
+    print(f"  full page rerun : {before * 1000:8.1f} ms")
+    print(f"  row fragment    : {after * 1000:8.1f} ms  ({before / after:.1f}x faster)")
+    print(f"  summary poll    : {summary * 1000:8.1f} ms  (once a second per open session, "
+          f"{summary * 100:.1f}% of a core)")
+
+if __name__ == '__main__':
+    main()
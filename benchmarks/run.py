@@ -0,0 +1,230 @@
+"""Benchmark the receipt pipeline stage by stage and compare against a baseline
+
+    python benchmarks/run.py                     # run and compare with baseline.json
+    python benchmarks/run.py --save-baseline     # record the current numbers
+    python benchmarks/run.py --only parse        # substring filter on benchmark names
+
+Each benchmark reports latency over repeated samples, throughput in its own
+units (lines, items, names, megapixels) and the peak Python allocation of
+one run. OCR benchmarks are skipped when neither tesserocr nor a Tesseract
+binary is found. A benchmark regresses when its fastest sample is more than
+--tolerance times the stored baseline's. Samples follow warm-up runs and are
+spread over the whole run, and the fastest is the one least disturbed by the
+rest of the machine. It moves far less between runs of the same code than the
+median does.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+
+from corpus import PRODUCE, receipt_lines, render_receipt, render_screenshot, walmart_lines
+from pantry import (apply_foodkeeper_matching, fuzzy_match, get_foodkeeper, make_ocr_engine, parse_receipt,
+                    parse_walmart_order)
+from pantry.engine import resolve_engine
+from pantry.layout import crop_text_rows
+from pantry.preprocess import preprocess_image
+from pantry.tesseract import TesseractNotFound, find_tesseract
+
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+# Shortest time one sample of a benchmark takes; fast ones run several times per sample
+MIN_SAMPLE_SECONDS = 0.02
+
+# Each benchmark's samples are spread evenly over this many passes through all the benchmarks
+ROUNDS = 10
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def runs_per_sample(fn, warmup=3):
+    """Calls of fn per sample, after warm-up: enough to fill MIN_SAMPLE_SECONDS"""
+    for _ in range(warmup):
+        fn()
+    start = time.perf_counter()
+    fn()
+    return max(1, int(MIN_SAMPLE_SECONDS / max(time.perf_counter() - start, 1e-9)))
+
+def measure(benchmarks, rounds=ROUNDS):
+    """Sorted per-call wall times in seconds, one per sample, for each (repeat, fn)
+
+    Shared machines run slow for seconds at a time. Samples are taken round-robin
+    over the whole run rather than back to back, so every benchmark's fastest
+    sample misses those stretches.
+    """
+    runs = [runs_per_sample(fn) for _, fn in benchmarks]
+    times = [[] for _ in benchmarks]
+    for round_idx in range(rounds):
+        for idx, (repeat, fn) in enumerate(benchmarks):
+            for _ in range((round_idx + 1) * repeat // rounds - round_idx * repeat // rounds):
+                start = time.perf_counter()
+                for _ in range(runs[idx]):
+                    fn()
+                times[idx].append((time.perf_counter() - start) / runs[idx])
+    return [sorted(samples) for samples in times]
+
+def traced_peak(fn):
+    """Peak traced Python allocation of one call of fn, in bytes"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def tesseract_available(cmd=None):
+    """Whether the engine make_ocr_engine picks can run: tesserocr, or a tesseract binary it finds"""
+    if resolve_engine() != 'subprocess':
+        return True
+    try:
+        find_tesseract(cmd)
+        return True
+    except TesseractNotFound:
+        return False
+
+def build_benchmarks(engine=None):
+    """(name, size label, units, unit name, repeat, callable) - OCR ones only with an engine"""
+    benchmarks = []
+
+    for count in (50, 500, 5000):
+        text = '\n'.join(receipt_lines(count, seed=count))
+        benchmarks.append(('parse_receipt', str(count), len(text.split('\n')), 'lines', 20,
+                           lambda text=text: parse_receipt(text)))
+
+    for count in (50, 500, 5000):
+        lines = walmart_lines(count, seed=count)
+        # Split across screenshots the way the scan handler receives them
+        texts = ['\n'.join(lines[start:start + 40]) for start in range(0, len(lines), 40)]
+        benchmarks.append(('parse_walmart_order', str(count), len(lines), 'lines', 20,
+                           lambda texts=texts: parse_walmart_order(texts)))
+
+    _, matcher = get_foodkeeper()
+    names = [line for line in receipt_lines(200, seed=1) if line.isupper()]
+    names += [f"GV {name[:-1]}" for name in PRODUCE] + ['ZZQX GIFT BAG', 'PAPER TOWELS 6PK']
+
+    def cold_fuzzy(names=names):
+        matcher.clear_memo()
+        for name in names:
+            fuzzy_match(name)
+    benchmarks.append(('fuzzy_match', 'cold', len(names), 'names', 10, cold_fuzzy))
+
+    for count in (100, 1000):
+        items = [{'name': name, 'price': 1.0, 'qty': 1} for name in (names * (count // len(names) + 1))[:count]]
+
+        def cold_matching(items=items):
+            matcher.clear_memo()
+            apply_foodkeeper_matching(items)
+        benchmarks.append(('apply_foodkeeper_matching', str(count), count, 'items', 10, cold_matching))
+
+    photos = {
+        '1MP': render_receipt(receipt_lines(20, seed=2), angle=2, frame=(864, 1152), font_size=14),
+        '12MP': render_receipt(receipt_lines(20, seed=3), angle=2),
+    }
+    for label, photo in photos.items():
+        megapixels = photo.width * photo.height / 1e6
+        benchmarks.append(('preprocess_image', label, megapixels, 'MP', 5,
+                           lambda photo=photo: preprocess_image(photo)))
+
+    app_screenshot = render_screenshot(walmart_lines(12, seed=4), chrome=True)
+    benchmarks.append(('crop_text_rows', '1170x2532', 1, 'images', 5,
+                       lambda: crop_text_rows(app_screenshot)))
+
+    if engine is not None:
+        processed = preprocess_image(photos['12MP'])
+        benchmarks.append(('ocr_receipt', '12MP', 1, 'images', 3,
+                           lambda: engine.image_to_string(processed)))
+        screenshot = render_screenshot(walmart_lines(12, seed=4))
+        benchmarks.append(('ocr_screenshot', '1170x2532', 1, 'images', 3,
+                           lambda: engine.image_to_string(screenshot)))
+        benchmarks.append(('ocr_app_screenshot', 'full', 1, 'images', 3,
+                           lambda: engine.image_to_string(app_screenshot)))
+        benchmarks.append(('ocr_app_screenshot', 'roi', 1, 'images', 3,
+                           lambda: engine.image_to_string(crop_text_rows(app_screenshot))))
+
+    return benchmarks
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', help="run benchmarks whose name contains this text")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON to compare with")
+    parser.add_argument('--save-baseline', action='store_true', help="write results as the new baseline")
+    parser.add_argument('--output', help="also write results JSON here")
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help="fail when the fastest sample exceeds the baseline's by this factor")
+    parser.add_argument('--tesseract-cmd', help="path to the tesseract binary")
+    args = parser.parse_args(argv)
+
+    engine = None
+    if tesseract_available(args.tesseract_cmd):
+        engine = make_ocr_engine(cmd=args.tesseract_cmd)
+    else:
+        print("Tesseract not found - skipping OCR benchmarks\n")
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    header = (f"{'benchmark':<28}{'size':>10}{'min ms':>11}{'p50 ms':>11}{'p95 ms':>11}{'max ms':>11}"
+              f"{'throughput':>18}{'peak KiB':>11}{'vs base':>9}")
+    print(header)
+    print('-' * len(header))
+
+    results = {}
+    regressions = []
+    benchmarks = [benchmark for benchmark in build_benchmarks(engine) if not args.only or args.only in benchmark[0]]
+    all_times = measure([(repeat, fn) for *_, repeat, fn in benchmarks])
+    for (name, size, units, unit_name, _, fn), times in zip(benchmarks, all_times):
+        peak = traced_peak(fn)
+        p50 = percentile(times, 0.5)
+        key = f"{name}[{size}]"
+        results[key] = {
+            'min_ms': times[0] * 1000,
+            'p50_ms': p50 * 1000,
+            'p95_ms': percentile(times, 0.95) * 1000,
+            'max_ms': times[-1] * 1000,
+            'throughput': units / p50 if p50 else 0.0,
+            'unit': unit_name,
+            'peak_kib': peak / 1024,
+        }
+
+        versus = ''
+        if key in baseline:
+            ratio = results[key]['min_ms'] / baseline[key]['min_ms']
+            versus = f"{ratio:8.2f}x"
+            if ratio > args.tolerance:
+                regressions.append((key, ratio))
+                versus += '!'
+
+        result = results[key]
+        print(f"{name:<28}{size:>10}{result['min_ms']:11.2f}{result['p50_ms']:11.2f}{result['p95_ms']:11.2f}{result['max_ms']:11.2f}"
+              f"{result['throughput']:12.1f} {unit_name + '/s':<5}{result['peak_kib']:11.1f}{versus:>9}")
+
+    if engine is not None:
+        engine.close()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'results': results}, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2, sort_keys=True)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.2f}x baseline:")
+        for key, ratio in regressions:
+            print(f"  {key}: {ratio:.2f}x")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
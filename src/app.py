@@ -1,343 +1,215 @@
+import os
 import streamlit as st
-import pytesseract
-from PIL import Image, ImageEnhance, ImageFilter
-import re
-import json
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from difflib import SequenceMatcher
-
-# Configure Tesseract
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
-@st.cache_data
-def load_foodkeeper():
-    """Load FoodKeeper database with shelf life info"""
-    try:
-        import os
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        filepath = os.path.join(current_dir, 'foodkeeper.json')
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return {food['name'].lower(): food for food in data['foods']}
-    except Exception as e:
-        st.warning(f"⚠️ Could not load FoodKeeper database. Using default shelf life estimates.")
-        return {}
-
-FOODKEEPER = load_foodkeeper()
-
-def preprocess_image(image):
-    """Enhance image for better OCR"""
-    # Convert to grayscale
-    image = image.convert('L')
-    
-    # Increase contrast
-    enhancer = ImageEnhance.Contrast(image)
-    image = enhancer.enhance(2.0)
-    
-    # Increase sharpness
-    enhancer = ImageEnhance.Sharpness(image)
-    image = enhancer.enhance(2.0)
-    
-    # Increase brightness slightly
-    enhancer = ImageEnhance.Brightness(image)
-    image = enhancer.enhance(1.2)
-    
-    return image
 
-def fuzzy_match(item_name, threshold=0.6):
-    """Match item name to FoodKeeper database using fuzzy string matching"""
-    item_lower = item_name.lower().strip()
-    best_match = None
-    best_score = threshold
-    
-    # Try exact substring match first (faster)
-    for food_name in FOODKEEPER.keys():
-        if food_name in item_lower or item_lower in food_name:
-            return FOODKEEPER[food_name]
-    
-    # Fall back to fuzzy matching
-    for food_name in FOODKEEPER.keys():
-        score = SequenceMatcher(None, item_lower, food_name).ratio()
-        if score > best_score:
-            best_score = score
-            best_match = food_name
-    
-    return FOODKEEPER.get(best_match) if best_match else None
+from pantry import (
+    AliasStore,
+    DuplicateIndex,
+    OCRCache,
+    PantryBoard,
+    PantryStore,
+    ScanQueue,
+    Upload,
+    start_digest_job,
+    start_warmup,
+    apply_foodkeeper_matching,
+)
+from pantry.config import (
+    ALIAS_DB_PATH,
+    DIGEST_DAYS,
+    OCR_CACHE_DIR,
+    OUTBOX_DIR,
+    PANTRY_DB_PATH,
+    PROFILE_DIR,
+    PROFILE_SCANS,
+    SCAN_HISTORY_DB_PATH,
+    SCAN_JOBS,
+    SCAN_JOBS_DB_PATH,
+)
+from pantry.profiling import Profiler, new_profile_dir
+from pantry.timing import NULL_TIMER
+from item_editor import ItemEditor, edit_item_row, editor_summary
 
-def get_shelf_life(item_name):
-    """Get shelf life data for an item"""
-    food_data = fuzzy_match(item_name)
-    
-    if food_data:
-        return {
-            'found': True,
-            'category': food_data.get('category', 'unknown'),
-            'recommended_storage': food_data.get('recommended_storage', 'shelf'),
-            'shelf_life_fridge': food_data.get('shelf_life_fridge'),
-            'shelf_life_shelf': food_data.get('shelf_life_shelf'),
-            'tips': food_data.get('tips', '')
-        }
-    else:
-        return {
-            'found': False,
-            'category': 'unknown',
-            'recommended_storage': 'shelf',
-            'shelf_life_fridge': 7,
-            'shelf_life_shelf': 7,
-            'tips': 'No specific data found. Using default estimate.'
-        }
-
-def parse_walmart_order(texts):
-    """Extract items from Walmart app screenshots - returns raw items without matching"""
-    items = []
-    combined_text = '\n'.join(texts)
-    lines = combined_text.split('\n')
-    
-    # Lines to skip - these aren't grocery items
-    skip_keywords = [
-        'delivered', 'items received', 'weight-adjusted', 'shopped', 'review item', 
-        'return eligible', 'delivery from', 'final weight', 'subtotal', 'driver tip',
-        'payment method', 'temporary hold', 'ending in', 'charge history',
-        'wove', 'congratulations', 'track order', 'contact', 'unavailable', 'how can we help',
-        'start a return', 'transaction activity', 'order#', 'your payment', 'charge',
-        'free delivery', 'sponsored'
-    ]
-    
-    totals_keywords = ['tax', 'total', 'subtotal', 'driver tip']
-    totals = {}
+@st.cache_resource
+def get_warmup():
+    """One background thread per server loading FoodKeeper and finding Tesseract before they are needed"""
+    return start_warmup()
 
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        line_lower = line.lower()
-        
-        if not line:
-            i += 1
-            continue
-        
-        # Capture order totals
-        if any(total_word in line_lower for total_word in totals_keywords):
-            price_match = re.search(r'\$(\d+[\.\s]\d{2})', line)
-            if price_match:
-                price = price_match.group(1).replace(' ', '.')
-                if 'tax' in line_lower:
-                    totals['tax'] = f'${price}'
-                elif 'subtotal' in line_lower:
-                    totals['subtotal'] = f'${price}'
-                elif 'driver tip' in line_lower:
-                    totals['driver_tip'] = f'${price}'
-                elif 'total' in line_lower and 'subtotal' not in line_lower:
-                    totals['total'] = f'${price}'
-            i += 1
-            continue
+# The page doesn't wait for the warm-up; what it found shows from the next rerun on
+WARMUP = get_warmup().results
+
+@st.cache_resource
+def get_ocr_cache():
+    """One OCR cache per server process, shared across sessions and reruns"""
+    return OCRCache(OCR_CACHE_DIR)
+
+@st.cache_resource
+def get_pantry_store():
+    """Persistent pantry database shared by every session"""
+    return PantryStore(PANTRY_DB_PATH)
+
+@st.cache_resource
+def get_alias_store():
+    """Names corrected in Step 1, remembered across sessions and restarts"""
+    return AliasStore(ALIAS_DB_PATH)
+
+@st.cache_resource
+def get_digest_job():
+    """One background thread per server writing the daily expiry digest to the outbox"""
+    return start_digest_job(get_pantry_store(), OUTBOX_DIR, DIGEST_DAYS)
+
+get_digest_job()
 
-        if any(skip in line_lower for skip in skip_keywords):
-            i += 1
+@st.cache_resource
+def get_duplicate_index():
+    """Hashes of every image scanned on this server, to catch a receipt uploaded twice"""
+    return DuplicateIndex(SCAN_HISTORY_DB_PATH)
+
+@st.cache_resource
+def get_scan_queue():
+    """Background scan workers shared by every session (SCAN_JOBS scans at a time per server)"""
+    return ScanQueue(SCAN_JOBS_DB_PATH, SCAN_JOBS, cache=get_ocr_cache(), on_done=get_duplicate_index().add)
+
+# How often the scan status panel polls its job
+SCAN_POLL = "1s"
+
+# Rows of each profile table shown on the page (the saved report has more)
+PROFILE_ROWS = 10
+
+def profiling_on():
+    """Profile scans when the server runs with PANTRY_PROFILE=1 or the URL has ?profile=1"""
+    return PROFILE_SCANS or st.query_params.get('profile') == '1'
+
+def start_scan(kind, img_files):
+    """Queue the uploads for scanning and remember the job, in the session and in the URL"""
+    queue = get_scan_queue()
+    # Scanning again replaces this session's earlier scan
+    if st.session_state.get('scan_job'):
+        queue.cancel(st.session_state.scan_job)
+    profile_dir = None
+    if profiling_on():
+        profile_dir = new_profile_dir(PROFILE_DIR)
+    job_id = queue.submit(kind, img_files, profile_dir=profile_dir)
+    st.session_state.scan_job = job_id
+    st.query_params['job'] = job_id
+    st.session_state.raw_items = None
+    st.session_state.step = 0
+    st.rerun()
+
+def get_uploads(uploaded_files):
+    """Each uploaded file read and decoded once per session, keyed by the uploader's file id"""
+    known = st.session_state.get('uploads', {})
+    st.session_state.uploads = {
+        uploaded.file_id: known.get(uploaded.file_id) or Upload.from_file(uploaded)
+        for uploaded in uploaded_files
+    }
+    return list(st.session_state.uploads.values())
+
+def load_scan_results(job):
+    """Hand a finished job's items to Step 1"""
+    st.session_state.scan_timer = get_scan_queue().timer(job['id'])
+    st.session_state.scan_profile = get_scan_queue().profile(job['id'])
+    st.session_state.match_profile = None
+    st.session_state.raw_items = job['items']
+    st.session_state.totals = job['totals']
+    st.session_state.step = 1
+    st.session_state.item_editor = None
+    st.session_state.pantry_saved = False
+
+def show_duplicates(kind, uploads, noun):
+    """Warn about uploads that were scanned before, and offer that scan's items when all of them were"""
+    matches = get_duplicate_index().find(kind, uploads)
+    earlier_scans = {}
+    for idx, match in enumerate(matches):
+        # Still in the uploader after this session's own scan - not a duplicate
+        if match is None or match['scan_id'] == st.session_state.get('scan_job'):
+            matches[idx] = None
             continue
-        
-        # Look for price pattern
-        price_match = re.search(r'\$(\d+[\.\s]\d{2})', line)
-        
-        if price_match:
-            price = price_match.group(1).replace(' ', '.')
-            item_name = line[:price_match.start()].strip()
-            
-            # Item names can span multiple lines - look backwards if needed
-            if not item_name or len(item_name) < 2:
-                for back_idx in range(1, min(4, i+1)):
-                    prev_line = lines[i-back_idx].strip()
-                    prev_line_lower = prev_line.lower()
-                    
-                    if any(skip in prev_line_lower for skip in skip_keywords) or \
-                       any(unit in prev_line_lower for unit in ['/lb', '/oz', '/fl', '/ea', 'multipack', 'qty']) or \
-                       any(total in prev_line_lower for total in totals_keywords):
-                        continue
-                    
-                    if item_name:
-                        item_name = prev_line + " " + item_name
-                    else:
-                        item_name = prev_line
-            
-            # Skip if we still don't have a valid item name
-            if not item_name or len(item_name) < 2 or item_name.isdigit() or item_name.startswith('$'):
-                i += 1
-                continue
-            
-            # Look for quantity in the next few lines
-            qty = 1
-            j = i + 1
-            
-            while j < len(lines) and j < i + 5:
-                next_line = lines[j].strip().lower()
-                
-                qty_match = re.search(r'qty\s*(\d+)', next_line)
-                if qty_match:
-                    qty = int(qty_match.group(1))
-                    break
-                
-                if any(unit in next_line for unit in ['/lb', '/oz', '/fl', '/ea', 'flavor:', 'size:', 'final weight', 'multipack']):
-                    j += 1
-                    continue
-                
-                if (re.search(r'\$\d+[\.\s]\d{2}', next_line) and j > i + 1) or \
-                   any(skip in next_line for skip in skip_keywords):
-                    break
-                
-                j += 1
-            
-            # Filter out obvious fragments
-            word_count = len(item_name.split())
-            if word_count == 1 and len(item_name) < 5:
-                i += 1
-                continue
-            
-            items.append({
-                'name': item_name,
-                'price': float(price),
-                'qty': qty
-            })
-            
-            i = j
+        if match['scan_id'] not in earlier_scans:
+            earlier_scans[match['scan_id']] = get_duplicate_index().scan(match['scan_id'])
+        earlier = earlier_scans[match['scan_id']]
+        # Its hashes outlived the scan itself (evicted since) - nothing to compare or reuse
+        if earlier is None:
+            matches[idx] = None
             continue
-        
-        i += 1
+        scanned_on = datetime.fromtimestamp(earlier['scanned_at']).strftime('%b %d, %Y')
+        st.warning(f"⚠️ {noun} {idx+1} looks like one you already scanned on {scanned_on}.")
     
-    totals = {'walmart_order': True, 'items_count': len(items)}
-    return items, totals
-
-def parse_receipt(text):
-    """Extract items from physical receipt"""
-    items = []
-    totals = {}
-    lines = text.split('\n')
+    # The uploads are exactly the images of one earlier scan: its items can be reused without OCR
+    if len(earlier_scans) == 1 and all(matches):
+        earlier = next(iter(earlier_scans.values()))
+        # All of its images, each once - not a few of them, or one of them twice
+        if (earlier['items'] and len(uploads) == earlier['image_count'] and
+                len({match['position'] for match in matches}) == len(uploads)):
+            st.button(f"♻️ Use the earlier scan's {len(earlier['items'])} items", on_click=load_scan_results,
+                      args=(earlier,), type="primary")
+
+def show_profile(summary):
+    """Slowest functions and biggest allocations of one profiled step, plus its .prof to download"""
+    st.markdown(f"**{summary['name'].capitalize()}** took {summary['seconds']:.2f}s "
+                f"(peak traced memory {summary['peak_kib'] / 1024:.1f} MiB)")
+    st.table([
+        {'Function': row['function'], 'Calls': row['calls'], 'Own (s)': round(row['own_seconds'], 3),
+         'Cumulative (s)': round(row['cumulative_seconds'], 3)}
+        for row in summary['functions'][:PROFILE_ROWS]
+    ])
+    if summary['allocations']:
+        st.table([
+            {'Allocated at': row['where'], 'KiB held': round(row['kib'], 1), 'Blocks': row['blocks']}
+            for row in summary['allocations'][:PROFILE_ROWS]
+        ])
+    st.caption(f"Saved to {summary['profile_path']} and {summary['allocations_path']}")
+    with open(summary['profile_path'], 'rb') as f:
+        st.download_button(f"Download {summary['name']}.prof", f.read(), file_name=f"{summary['name']}.prof",
+                           mime="application/octet-stream", key=f"download_{summary['name']}_profile")
+
+def show_items_found(job):
+    """The last few items a scan has read so far"""
+    if job['items']:
+        st.caption(f"Found {len(job['items'])} items so far: "
+                   + ", ".join(item['name'] for item in job['items'][-5:]))
+
+def scan_job_status(job_id):
+    """A queued or running scan's polling panel, or how a finished one ended - which needs no polling"""
+    job = get_scan_queue().get(job_id)
+    if job is None:
+        st.warning("That scan is no longer available. Please upload and scan again.")
+        return
+    if job['status'] in ('queued', 'running'):
+        scan_job_progress(job_id)
+        return
     
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        line_lower = line.lower()
-        
-        if not line:
-            i += 1
-            continue
-        
-        # Skip junk lines
-        if any(word in line_lower for word in ['you saved', 'regular price', 'subtotal', 'ending in', 'www.', 'register', 'cashier']):
-            i += 1
-            continue
-        
-        # Capture totals
-        if 'tax' in line_lower and 'total' not in line_lower:
-            price_match = re.search(r'(\d{1,4})\.(\d{2})', line)
-            if price_match:
-                totals['tax'] = f"${price_match.group(1)}.{price_match.group(2)}"
-            i += 1
-            continue
-        
-        if 'total' in line_lower:
-            price_match = re.search(r'(\d{1,4})\.(\d{2})', line)
-            if price_match:
-                totals['grand_total'] = f"${price_match.group(1)}.{price_match.group(2)}"
-            i += 1
-            continue
-        
-        # Pattern 1: Everything on same line with proper decimals
-        # "GREEN PEPPER    1.04 @ 1.29  1.34 N"
-        match1 = re.search(r'^(.+?)\s+(\d+\.?\d*)\s*@\s*(\d+\.\d{2})\s+(\d+\.\d{2})\s*[NSTB]', line, re.IGNORECASE)
-        
-        if match1:
-            item_name = match1.group(1).strip()
-            qty = float(match1.group(2))
-            total_price = float(match1.group(4))
-            
-            # Clean item name
-            item_name = re.sub(r'^\d+\s+', '', item_name)
-            
-            if len(item_name) > 2 and any(c.isalpha() for c in item_name):
-                items.append({
-                    'name': item_name,
-                    'price': total_price,
-                    'qty': max(1, int(qty)) if qty >= 1 else 1
-                })
-            i += 1
-            continue
-        
-        # Pattern 2: Everything on same line WITHOUT decimals (OCR missed them)
-        # "1.04 @ 129  134N" - need to add decimals
-        match2 = re.search(r'(\d+\.?\d*)\s*@\s*(\d{3,4})\s+(\d{3,4})\s*[NSTB]', line, re.IGNORECASE)
-        
-        if match2:
-            qty = float(match2.group(1))
-            total_str = match2.group(3)
-            
-            # Add decimal point
-            total_price = float(f"{total_str[:-2]}.{total_str[-2:]}")
-            
-            # Look for item name in PREVIOUS line
-            if i > 0:
-                item_name = lines[i-1].strip()
-                item_name = re.sub(r'^\d+\s+', '', item_name)
-                item_name = re.sub(r'[:\.].*$', '', item_name).strip()
-                
-                if len(item_name) > 2 and any(c.isalpha() for c in item_name):
-                    items.append({
-                        'name': item_name,
-                        'price': total_price,
-                        'qty': max(1, int(qty)) if qty >= 1 else 1
-                    })
-            i += 1
-            continue
-        
-        # Pattern 3: Price line with qty@ format (no item name on this line)
-        # "1@ 1299 N" or "2@ 349"
-        match3 = re.search(r'^(\d+)\s*@\s*(\d{3,4})\s*[NSTB]?', line, re.IGNORECASE)
-        
-        if match3:
-            qty = int(match3.group(1))
-            price_str = match3.group(2)
-            
-            # Add decimal
-            total_price = float(f"{price_str[:-2]}.{price_str[-2:]}")
-            
-            # Item name from PREVIOUS line
-            if i > 0:
-                item_name = lines[i-1].strip()
-                item_name = re.sub(r'^\d+\s+', '', item_name)
-                item_name = re.sub(r'[:\.].*$', '', item_name).strip()
-                
-                if len(item_name) > 2 and any(c.isalpha() for c in item_name):
-                    items.append({
-                        'name': item_name,
-                        'price': total_price,
-                        'qty': qty
-                    })
-            i += 1
-            continue
-        
-        i += 1
+    if job['status'] == 'done':
+        load_scan_results(job)
+        st.rerun()
     
-    return items, totals
-
-def apply_foodkeeper_matching(items):
-    """Apply FoodKeeper matching to cleaned items after user edits"""
-    matched_items = []
-    for item in items:
-        shelf_data = get_shelf_life(item['name'])
-        matched_items.append({
-            'name': item['name'],
-            'price': f"${item['price']:.2f}",
-            'qty': item['qty'],
-            'category': shelf_data['category'],
-            'category_display': shelf_data.get('category', 'unknown'),
-            'recommended_storage': shelf_data['recommended_storage'],
-            'shelf_life_fridge': shelf_data['shelf_life_fridge'],
-            'shelf_life_shelf': shelf_data['shelf_life_shelf'],
-            'tips': shelf_data['tips'],
-            'storage_location': 'unsorted',
-            'expiry_days': None,
-            'is_produce': shelf_data['found']
-        })
-    return matched_items
+    noun = "receipts" if job['kind'] == 'receipt' else "screenshots"
+    if job['status'] == 'cancelled':
+        st.warning(f"Scan cancelled after {job['done']} of {job['total']} {noun}.")
+    else:
+        st.error(f"Scan failed: {job['error']}")
+    show_items_found(job)
+    if job['items'] and st.button(f"Edit the {len(job['items'])} items found →"):
+        load_scan_results(job)
+        st.rerun()
+
+@st.fragment(run_every=SCAN_POLL)
+def scan_job_progress(job_id):
+    """Progress, items found so far and a cancel button - only this panel reruns while polling"""
+    queue = get_scan_queue()
+    job = queue.get(job_id)
+    # Finished, cancelled, failed or gone: rerun the page, which stops the polling
+    if job is None or job['status'] not in ('queued', 'running'):
+        st.rerun()
+    
+    noun = "receipts" if job['kind'] == 'receipt' else "screenshots"
+    if job['status'] == 'queued':
+        st.info(f"⏳ Waiting for a free scanner ({job['position']} in line)...")
+    else:
+        st.progress(job['done'] / job['total'], text=f"Read {job['done']} of {job['total']} {noun}")
+    show_items_found(job)
+    st.button("✖️ Cancel Scan", on_click=queue.cancel, args=(job_id,))
 
 # ============================================================================
 # STREAMLIT UI
@@ -345,6 +217,12 @@ def apply_foodkeeper_matching(items):
 
 st.set_page_config(page_title="Smart Pantry Assistant", layout="wide")
 
+# Only after set_page_config, which must be the first Streamlit command on the page
+if WARMUP.get('foodkeeper', {}).get('foods', 1) == 0 or 'error' in WARMUP.get('foodkeeper', {}):
+    st.warning(f"⚠️ Could not load FoodKeeper database. Using default shelf life estimates.")
+if 'error' in WARMUP.get('tesseract', {}):
+    st.warning(f"⚠️ {WARMUP['tesseract']['error']} Scans will fail until then.")
+
 # Start Over button at the top (always accessible)
 col_title, col_reset = st.columns([5, 1])
 with col_title:
@@ -355,9 +233,10 @@ with col_reset:
     # Only show Start Over if we're past step 0
     if 'step' in st.session_state and st.session_state.step > 0:
         if st.button("🔄 Start Over", use_container_width=True, type="secondary"):
-            # Clear ALL session state
+            # Clear ALL session state (and the scan job in the URL; ?profile=1 stays)
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
+            st.query_params.pop('job', None)
             # Reset to initial state
             st.session_state.step = 0
             st.session_state.upload_key = 0
@@ -372,11 +251,35 @@ if 'totals' not in st.session_state:
     st.session_state.totals = None
 if 'step' not in st.session_state:
     st.session_state.step = 0
-if 'selected_items' not in st.session_state:
-    st.session_state.selected_items = []
+if 'pantry_board' not in st.session_state:
+    st.session_state.pantry_board = None
 if 'order_type' not in st.session_state:
     st.session_state.order_type = None
 
+# After a browser refresh, pick the scan back up from the job id in the URL
+if 'scan_job' not in st.session_state and st.query_params.get('job'):
+    restored_job = get_scan_queue().get(st.query_params['job'])
+    st.session_state.scan_job = restored_job['id'] if restored_job else None
+    if restored_job:
+        st.session_state.order_type = restored_job['kind']
+
+# Saved pantry - what's about to expire across past purchases
+with st.sidebar:
+    st.header("🧺 My Pantry")
+    expiring_days = st.slider("Expiring within (days)", min_value=1, max_value=30, value=7)
+    # Answered from the in-memory expiry calendar, not a query per rerun
+    expiring_items = get_pantry_store().calendar().expiring_within(expiring_days)
+    if expiring_items:
+        for saved in expiring_items:
+            location_icon = "🧊" if saved['storage_location'] == 'fridge' else "🗄️"
+            expiry_date = datetime.fromisoformat(saved['expiry_date'])
+            st.write(f"{location_icon} {saved['name']} - {expiry_date.strftime('%b %d, %Y')}")
+    else:
+        st.caption("Nothing expiring soon 🎉")
+    
+    st.divider()
+    show_timings = st.checkbox("⏱️ Show scan timings", value=False)
+
 # Step 0: Choose order type
 
 st.subheader("📱 What type of order?")
@@ -405,73 +308,85 @@ uploaded_files = st.file_uploader(
     accept_multiple_files=True,
     key=f"file_uploader_{st.session_state.upload_key}"
 )
-uploaded_file = uploaded_files if uploaded_files else None
+uploaded_file = get_uploads(uploaded_files) if uploaded_files else None
+
+ocr_cache_stats = get_ocr_cache().stats()
+if ocr_cache_stats['hits'] or ocr_cache_stats['misses']:
+    st.caption(f"🗃️ OCR cache: {ocr_cache_stats['hits']} hits / {ocr_cache_stats['misses']} misses "
+               f"({ocr_cache_stats['hit_rate']:.0%} hit rate)")
+
+alias_stats = get_alias_store().stats()
+if alias_stats['size']:
+    st.caption(f"🏷️ Learned names: {alias_stats['size']} ({alias_stats['hits']} hits / "
+               f"{alias_stats['misses']} misses, {alias_stats['hit_rate']:.0%} hit rate)")
+
+# Debug panel: where the last scan's time went
+if show_timings and st.session_state.get('scan_timer'):
+    scan_timer = st.session_state.scan_timer
+    timings = scan_timer.to_dict()
+    with st.expander(f"⏱️ Last scan took {timings['wall_seconds']:.2f}s", expanded=True):
+        st.table([
+            {'Stage': stage, 'Total (s)': round(values['seconds'], 3), 'Calls': values['calls'],
+             'Mean (ms)': round(values['mean_ms'], 1), 'Max (ms)': round(values['max_ms'], 1)}
+            for stage, values in sorted(timings['stages'].items(), key=lambda kv: -kv[1]['seconds'])
+        ])
+        st.caption("  •  ".join(f"{name}: {value}" for name, value in timings['counters'].items()))
+        st.caption("Images are read on several threads at once, so stage totals can add up to more than the wall time.")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Download JSON", scan_timer.to_json(), file_name="scan_timings.json",
+                               mime="application/json", use_container_width=True)
+        with col2:
+            st.download_button("Download Prometheus", scan_timer.to_prometheus(), file_name="scan_timings.prom",
+                               mime="text/plain", use_container_width=True)
+
+# Profiled scan (and its matching once done): where the time and memory went
+if st.session_state.get('scan_profile'):
+    with st.expander("🔬 Profile of the last scan", expanded=True):
+        show_profile(st.session_state.scan_profile)
+        st.caption("OCR runs on separate image workers, so here it shows up as waiting (ocr_wait); "
+                   "tick ⏱️ Show scan timings for its breakdown.")
+        if st.session_state.get('match_profile'):
+            show_profile(st.session_state.match_profile)
+
+# The scan runs in the background; its panel polls it until the items are ready
+if st.session_state.get('scan_job') and st.session_state.step == 0:
+    scan_job_status(st.session_state.scan_job)
 
 if uploaded_file:
     # Scan receipts
     if st.session_state.order_type == "receipt":
         st.write(f"📸 {len(uploaded_file)} receipt images uploaded")
         
+        # Small cached thumbnails, not full-size images re-sent on every rerun
         with st.expander("Preview receipts"):
             cols = st.columns(min(3, len(uploaded_file)))
-            for idx, img_file in enumerate(uploaded_file):
-                img = Image.open(img_file)
+            for idx, upload in enumerate(uploaded_file):
                 with cols[idx % 3]:
-                    st.image(img, caption=f"Receipt {idx+1}", use_column_width=True)
+                    st.image(upload.thumbnail(), caption=f"Receipt {idx+1}", use_column_width=True)
+        
+        show_duplicates("receipt", uploaded_file, "Receipt")
         
         if st.button("Scan Receipts"):
-            with st.spinner("Reading receipts..."):
-                all_items = []
-                combined_totals = {}
-                
-                for img_file in uploaded_file:
-                    image = Image.open(img_file)
-                    processed_image = preprocess_image(image)
-                    text = pytesseract.image_to_string(processed_image)
-                    items, totals = parse_receipt(text)
-                    all_items.extend(items)
-                    
-                    # Combine taxes from multiple receipts
-                    if totals.get('tax'):
-                        tax_val = float(totals['tax'].replace('$', ''))
-                        current_tax = float(combined_totals.get('tax', '$0.00').replace('$', ''))
-                        combined_totals['tax'] = f"${current_tax + tax_val:.2f}"
-                
-                st.session_state.raw_items = all_items
-                st.session_state.totals = combined_totals if combined_totals else {}
-                st.session_state.step = 1
-                
-                st.success(f"Found {len(all_items)} items from {len(uploaded_file)} receipts!")
-                st.rerun()
+            start_scan("receipt", uploaded_file)
     
     else:  # Walmart
         st.write(f"📸 {len(uploaded_file)} screenshots uploaded")
         
         with st.expander("Preview screenshots"):
             cols = st.columns(min(3, len(uploaded_file)))
-            for idx, img_file in enumerate(uploaded_file):
-                img = Image.open(img_file)
+            for idx, upload in enumerate(uploaded_file):
                 with cols[idx % 3]:
-                    st.image(img, caption=f"Image {idx+1}", use_column_width=True)
+                    st.image(upload.thumbnail(), caption=f"Image {idx+1}", use_column_width=True)
+        
+        show_duplicates("walmart", uploaded_file, "Screenshot")
         
         if st.button("Scan Reciept"):
-            with st.spinner("Reading screenshots..."):
-                texts = []
-                for img_file in uploaded_file:
-                    image = Image.open(img_file)
-                    text = pytesseract.image_to_string(image)
-                    texts.append(text)
-                
-                items, totals = parse_walmart_order(texts)
-                
-                st.session_state.raw_items = items
-                st.session_state.totals = totals
-                st.session_state.step = 1
-                
-                st.success(f"Found {len(items)} items from {len(uploaded_file)} screenshots!")
-                st.rerun()
+            start_scan("walmart", uploaded_file)
 
-   
+# Scanned items stay editable even once the uploads are gone (e.g. after a refresh)
+if st.session_state.step > 0:
     # ========================================================================
     # Step 1: EDIT ITEMS
     # ========================================================================
@@ -496,38 +411,13 @@ if uploaded_file:
         
         st.divider()
         
-        edited_items = []
-        items_to_delete = []
+        # Rows live in an editor model built once per scan; each row is its own
+        # fragment, so editing one row doesn't rerun the others
+        if st.session_state.get('item_editor') is None:
+            st.session_state.item_editor = ItemEditor(st.session_state.raw_items, get_alias_store())
         
-        # Edit existing items
-        for idx, item in enumerate(st.session_state.raw_items):
-            col1, col2, col3, col4 = st.columns([5, 2, 2, 1])
-            
-            with col1:
-                new_name = st.text_input("Item Name", value=item['name'], key=f"name_{idx}", 
-                                        label_visibility="collapsed", placeholder="Item name")
-            
-            with col2:
-                new_qty = st.number_input("Qty", value=item['qty'], min_value=1, key=f"qty_{idx}", 
-                                         label_visibility="collapsed")
-            
-            with col3:
-                # Single total price field
-                total_price = item['price'] * item['qty'] if 'qty' in item else item['price']
-                new_total = st.number_input("Total Price", value=total_price, min_value=0.01, 
-                                           step=0.01, format="%.2f", key=f"total_{idx}", 
-                                           label_visibility="collapsed")
-            
-            with col4:
-                if st.button("🗑️", key=f"del_{idx}", help="Delete this item"):
-                    items_to_delete.append(idx)
-            
-            if idx not in items_to_delete:
-                edited_items.append({
-                    'name': new_name,
-                    'qty': new_qty,
-                    'price': new_total / new_qty
-                })
+        for row_id in list(st.session_state.item_editor.rows):
+            edit_item_row(row_id)
         
         # Show new item form if user clicked "Add Item"
         if st.session_state.adding_new_item:
@@ -549,12 +439,7 @@ if uploaded_file:
             with col4:
                 if st.button("➕", key="confirm_add", help="Add this item", use_container_width=True):
                     if add_name.strip() and add_price > 0:
-                        edited_items.append({
-                            'name': add_name.strip(),
-                            'qty': add_qty,
-                            'price': add_price / add_qty
-                        })
-                        st.session_state.raw_items = edited_items
+                        st.session_state.item_editor.add(add_name.strip(), add_qty, add_price)
                         st.session_state.adding_new_item = False
                         st.success(f"✅ Added {add_name.strip()}")
                         st.rerun()
@@ -571,59 +456,18 @@ if uploaded_file:
         
         # Summary and next
         st.markdown("---")
-        col1, col2 = st.columns([3, 1])
         
-        with col1:
-            subtotal = sum(item['price'] * item['qty'] for item in edited_items)
-            
-            # Initialize editing state
-            if 'editing_totals' not in st.session_state:
-                st.session_state.editing_totals = False
-            
-            # Get tax value
-            default_tax = 0.00
-            if st.session_state.totals.get('tax'):
-                default_tax = float(st.session_state.totals['tax'].replace('$', ''))
-            
-            # Display mode
-            if not st.session_state.editing_totals:
-                st.write(f"**Subtotal: ${subtotal:.2f}** ({len(edited_items)} items)")
-                st.write(f"**Tax: ${default_tax:.2f}**")
-                st.write(f"**Grand Total: ${subtotal + default_tax:.2f}**")
-                
-                if st.button("✏️ Edit Tax", key="enable_edit_tax"):
-                    st.session_state.editing_totals = True
-                    st.rerun()
-            
-            # Edit mode
-            else:
-                st.write(f"**Subtotal: ${subtotal:.2f}** ({len(edited_items)} items)")
-                
-                tax_amount = st.number_input(
-                    "Tax:",
-                    value=default_tax,
-                    min_value=0.00,
-                    step=0.01,
-                    format="%.2f",
-                    key="edit_tax"
-                )
-                
-                st.write(f"**Grand Total: ${subtotal + tax_amount:.2f}**")
-                
-                if st.button("✅ Save Tax", key="save_tax"):
-                    st.session_state.totals['tax'] = f"${tax_amount:.2f}"
-                    st.session_state.editing_totals = False
-                    st.rerun()
+        def go_to_matching(edited_items):
+            st.session_state.raw_items = edited_items
+            # A profiled scan's matching is profiled too, into the same folder
+            scan_profile = st.session_state.get('scan_profile')
+            profiler = Profiler(scan_profile['directory'], 'match') if scan_profile else nullcontext()
+            with profiler, (st.session_state.get('scan_timer') or NULL_TIMER).stage('match'):
+                st.session_state.scanned_items = apply_foodkeeper_matching(edited_items, get_alias_store())
+            st.session_state.match_profile = getattr(profiler, 'summary', None)
+            st.session_state.step = 2
         
-        with col2:
-            if edited_items:
-                if st.button("Next: Match Items →", type="primary", use_container_width=True):
-                    st.session_state.raw_items = edited_items
-                    st.session_state.scanned_items = apply_foodkeeper_matching(edited_items)
-                    st.session_state.step = 2
-                    st.rerun()
-            else:
-                st.button("Next: Match Items →", disabled=True, help="Add at least one item")
+        editor_summary(go_to_matching)
             
     # ========================================================================
     # Step 2: FILTER GROCERY ITEMS
@@ -677,7 +521,7 @@ if uploaded_file:
     # ========================================================================
     if st.session_state.get('step') == 3:
         # Auto-select all filtered items and jump to Step 4
-        st.session_state.selected_items = st.session_state.scanned_items
+        st.session_state.pantry_board = PantryBoard(st.session_state.scanned_items)
         st.session_state.step = 4
         st.rerun()
     
@@ -688,124 +532,109 @@ if uploaded_file:
         st.subheader("🗂️ Organize Your Pantry")
         st.write("Drag items into Fridge or Shelf. Expiry dates are auto-filled based on USDA guidelines.")
         
+        board = st.session_state.pantry_board
+        today = datetime.now()
         col_unsorted, col_fridge, col_shelf = st.columns(3)
         
         # Unsorted column
         with col_unsorted:
             st.markdown("### 📦 Unsorted")
-            unsorted_count = 0
             
-            for idx, item in enumerate(st.session_state.selected_items):
-                if item['storage_location'] == 'unsorted':
-                    unsorted_count += 1
-                    
-                    st.write(f"**{item['name']}**")
-                    st.caption(f"{item['price']} • Qty: {item['qty']}")
-                    if item['category'] != 'unknown':
-                        st.caption(f"📚 {item['category'].capitalize()}")
-                    
-                    btn_col1, btn_col2, btn_col3 = st.columns(3)
-                    with btn_col1:
-                        if st.button("→ Fridge", key=f"to_fridge_{idx}", use_container_width=True):
-                            item['storage_location'] = 'fridge'
-                            if item['shelf_life_fridge']:
-                                item['expiry_days'] = item['shelf_life_fridge']
-                            st.rerun()
-                    
-                    with btn_col2:
-                        if st.button("→ Shelf", key=f"to_shelf_{idx}", use_container_width=True):
-                            item['storage_location'] = 'shelf'
-                            if item['shelf_life_shelf']:
-                                item['expiry_days'] = item['shelf_life_shelf']
-                            st.rerun()
-                    
-                    with btn_col3:
-                        if st.button("Skip ⏭️", key=f"skip_{idx}", use_container_width=True, help="Not a food item"):
-                            item['storage_location'] = 'skipped'
-                            st.rerun()
-                    
-                    st.divider()
+            for idx, item in board.in_location('unsorted'):
+                st.write(f"**{item['name']}**")
+                st.caption(f"{item['price']} • Qty: {item['qty']}")
+                if item['category'] != 'unknown':
+                    st.caption(f"📚 {item['category'].capitalize()}")
+                
+                btn_col1, btn_col2, btn_col3 = st.columns(3)
+                with btn_col1:
+                    if st.button("→ Fridge", key=f"to_fridge_{idx}", use_container_width=True):
+                        board.move(idx, 'fridge')
+                        st.rerun()
+                
+                with btn_col2:
+                    if st.button("→ Shelf", key=f"to_shelf_{idx}", use_container_width=True):
+                        board.move(idx, 'shelf')
+                        st.rerun()
+                
+                with btn_col3:
+                    if st.button("Skip ⏭️", key=f"skip_{idx}", use_container_width=True, help="Not a food item"):
+                        board.move(idx, 'skipped')
+                        st.rerun()
+                
+                st.divider()
             
-            if unsorted_count == 0:
+            if board.all_organized:
                 st.success("✓ All items organized!")
         
         # Fridge column
         with col_fridge:
             st.markdown("### 🧊 Refrigerator")
-            fridge_count = 0
             
-            for idx, item in enumerate(st.session_state.selected_items):
-                if item['storage_location'] == 'fridge':
-                    fridge_count += 1
-                    
-                    st.write(f"**{item['name']}**")
-                    st.caption(f"{item['price']} • {item['category'].capitalize()}")
-                    
-                    default_days = item['expiry_days'] or item['shelf_life_fridge'] or 7
-                    expiry = st.number_input(
-                        "Days until expiry:",
-                        min_value=1,
-                        max_value=365,
-                        value=default_days,
-                        key=f"fridge_exp_{idx}"
-                    )
-                    item['expiry_days'] = expiry
-                    
-                    expiry_date = datetime.now() + timedelta(days=expiry)
-                    st.caption(f"📅 Expires: {expiry_date.strftime('%b %d, %Y')}")
-                    
-                    if item['tips'] and 'No specific data' not in item['tips']:
-                        st.caption(f"💡 {item['tips'][:50]}...")
-                    
-                    if st.button("← Back", key=f"fridge_back_{idx}", use_container_width=True):
-                        item['storage_location'] = 'unsorted'
-                        st.rerun()
-                    
-                    st.divider()
+            for idx, item in board.in_location('fridge'):
+                st.write(f"**{item['name']}**")
+                st.caption(f"{item['price']} • {item['category'].capitalize()}")
+                
+                default_days = item['expiry_days'] or item['shelf_life_fridge'] or 7
+                expiry = st.number_input(
+                    "Days until expiry:",
+                    min_value=1,
+                    max_value=365,
+                    value=default_days,
+                    key=f"fridge_exp_{idx}"
+                )
+                item['expiry_days'] = expiry
+                
+                expiry_date = today + timedelta(days=expiry)
+                st.caption(f"📅 Expires: {expiry_date.strftime('%b %d, %Y')}")
+                
+                if item['tips'] and 'No specific data' not in item['tips']:
+                    st.caption(f"💡 {item['tips'][:50]}...")
+                
+                if st.button("← Back", key=f"fridge_back_{idx}", use_container_width=True):
+                    board.move(idx, 'unsorted')
+                    st.rerun()
+                
+                st.divider()
             
-            st.metric("Items in Fridge", fridge_count)
+            st.metric("Items in Fridge", board.count('fridge'))
         
         # Shelf column
         with col_shelf:
             st.markdown("### 🗄️ Pantry Shelf")
-            shelf_count = 0
             
-            for idx, item in enumerate(st.session_state.selected_items):
-                if item['storage_location'] == 'shelf':
-                    shelf_count += 1
-                    
-                    st.write(f"**{item['name']}**")
-                    st.caption(f"{item['price']} • {item['category'].capitalize()}")
-                    
-                    default_days = item['expiry_days'] or item['shelf_life_shelf'] or 30
-                    expiry = st.number_input(
-                        "Days until expiry:",
-                        min_value=1,
-                        max_value=730,
-                        value=default_days,
-                        key=f"shelf_exp_{idx}"
-                    )
-                    item['expiry_days'] = expiry
-                    
-                    expiry_date = datetime.now() + timedelta(days=expiry)
-                    st.caption(f"📅 Expires: {expiry_date.strftime('%b %d, %Y')}")
-                    
-                    if item['tips'] and 'No specific data' not in item['tips']:
-                        st.caption(f"💡 {item['tips'][:50]}...")
-                    
-                    if st.button("← Back", key=f"shelf_back_{idx}", use_container_width=True):
-                        item['storage_location'] = 'unsorted'
-                        st.rerun()
-                    
-                    st.divider()
+            for idx, item in board.in_location('shelf'):
+                st.write(f"**{item['name']}**")
+                st.caption(f"{item['price']} • {item['category'].capitalize()}")
+                
+                default_days = item['expiry_days'] or item['shelf_life_shelf'] or 30
+                expiry = st.number_input(
+                    "Days until expiry:",
+                    min_value=1,
+                    max_value=730,
+                    value=default_days,
+                    key=f"shelf_exp_{idx}"
+                )
+                item['expiry_days'] = expiry
+                
+                expiry_date = today + timedelta(days=expiry)
+                st.caption(f"📅 Expires: {expiry_date.strftime('%b %d, %Y')}")
+                
+                if item['tips'] and 'No specific data' not in item['tips']:
+                    st.caption(f"💡 {item['tips'][:50]}...")
+                
+                if st.button("← Back", key=f"shelf_back_{idx}", use_container_width=True):
+                    board.move(idx, 'unsorted')
+                    st.rerun()
+                
+                st.divider()
             
-            st.metric("Items on Shelf", shelf_count)
+            st.metric("Items on Shelf", board.count('shelf'))
         
         # Progress bar
         st.markdown("---")
-        categorized = sum(1 for item in st.session_state.selected_items 
-                         if item['storage_location'] not in ['unsorted'])
-        total = len(st.session_state.selected_items)
+        categorized = board.organized
+        total = len(board)
         
         st.progress(categorized / total if total > 0 else 0)
         st.caption(f"Progress: {categorized}/{total} items organized")
@@ -818,20 +647,22 @@ if uploaded_file:
                 st.rerun()
         
         with col2:
-            all_categorized = all(item['storage_location'] not in ['unsorted'] 
-                                 for item in st.session_state.selected_items)
-            if all_categorized:
+            if st.session_state.get('pantry_saved'):
+                st.success("🎉 Items saved to your pantry!")
+            elif board.all_organized:
                 if st.button("✅ Save to Pantry", type="primary", use_container_width=True):
-                    st.success("🎉 Items saved to your pantry!")
+                    # Whole receipt goes in as one transaction ("skipped" items are left out)
+                    placed_items = board.placed_items()
+                    saved_count = get_pantry_store().add_items(placed_items)
+                    st.session_state.pantry_saved = True
+                    st.success(f"🎉 {saved_count} items saved to your pantry!")
                     st.balloons()
                     
                     with st.expander("📊 View Saved Items"):
-                        for item in st.session_state.selected_items:
-                            # Only show items in fridge/shelf (skip "skipped" items)
-                            if item['storage_location'] in ['fridge', 'shelf']:
-                                expiry_date = datetime.now() + timedelta(days=item['expiry_days'])
-                                location_icon = "🧊" if item['storage_location'] == 'fridge' else "🗄️"
-                                st.write(f"{location_icon} {item['name']} - Expires {expiry_date.strftime('%b %d, %Y')}")
+                        for item in placed_items:
+                            expiry_date = today + timedelta(days=item['expiry_days'])
+                            location_icon = "🧊" if item['storage_location'] == 'fridge' else "🗄️"
+                            st.write(f"{location_icon} {item['name']} - Expires {expiry_date.strftime('%b %d, %Y')}")
             else:
                 st.button("✅ Save to Pantry", disabled=True, 
-                         help="Please organize all items first!")
\ No newline at end of file
+                         help="Please organize all items first!")
@@ -0,0 +1,32 @@
+"""Compile foodkeeper.json into the SQLite artifact the app reads
+
+    python src/build_foodkeeper.py
+    python src/build_foodkeeper.py path/to/foodkeeper.json -o dist/foodkeeper.db
+
+The app also does this on first use whenever the JSON is newer than the
+artifact; run it ahead of time (e.g. when deploying) so no worker pays for
+parsing the JSON.
+"""
+import argparse
+import os
+import sys
+import time
+
+from pantry.config import FOODKEEPER_DB_PATH, FOODKEEPER_PATH
+from pantry.foodkeeper import foodkeeper_version
+from pantry.foodkeeper_db import compile_foodkeeper
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile foodkeeper.json into a SQLite artifact")
+    parser.add_argument('source', nargs='?', default=FOODKEEPER_PATH, help="FoodKeeper JSON file")
+    parser.add_argument('-o', '--output', default=FOODKEEPER_DB_PATH, help="artifact to write")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    version = foodkeeper_version(args.source)
+    count = compile_foodkeeper(args.source, args.output, list(version) if version else None)
+    print(f"Compiled {count} foods into {args.output} ({os.path.getsize(args.output) / 1024:.0f} KiB) "
+          f"in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""Write today's pantry expiry digest to the outbox (for cron / Task Scheduler)
+
+    python src/digest.py
+    python src/digest.py --days 7 --outbox ~/pantry-outbox
+
+The Streamlit app does the same hourly in the background while it runs;
+either way at most one digest is written per day.
+"""
+import argparse
+import sys
+
+from pantry import PantryStore, write_digest
+from pantry.config import DIGEST_DAYS, OUTBOX_DIR, PANTRY_DB_PATH
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write today's pantry expiry digest")
+    parser.add_argument('--days', type=int, default=DIGEST_DAYS, help="include items expiring within this many days")
+    parser.add_argument('--outbox', default=OUTBOX_DIR, help="directory the digest is written to")
+    parser.add_argument('--db', default=PANTRY_DB_PATH, help="pantry database")
+    args = parser.parse_args(argv)
+
+    path = write_digest(PantryStore(args.db).calendar(), args.outbox, args.days)
+    print(f"Wrote {path}" if path else "No digest written (already sent today, or nothing expiring)",
+          file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
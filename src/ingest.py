@@ -0,0 +1,138 @@
+"""Headless batch ingest of receipt images into JSONL
+
+    python src/ingest.py receipts/ --type receipt -o receipts.jsonl
+    python src/ingest.py orders/ --type walmart --workers 8 --match
+
+Receipt mode writes one line per image. Walmart mode treats every
+sub-directory (or the directory itself) as one order whose screenshots are
+read in file-name order.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from pantry import (
+    OCRCache,
+    StageTimer,
+    apply_foodkeeper_matching,
+    iter_ocr_images,
+    make_ocr_engine,
+    ocr_images,
+    parse_receipt,
+    parse_walmart_order,
+    receipt_line_ok,
+    walmart_line_ok,
+)
+from pantry.config import OCR_CACHE_DIR, OCR_ENGINE, OCR_MODE, OCR_WORKERS
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def list_images(directory):
+    """Image files directly inside directory, sorted by name"""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+def find_orders(directory):
+    """(order name, screenshots) for each Walmart order under directory"""
+    orders = []
+    own_images = list_images(directory)
+    if own_images:
+        orders.append((os.path.basename(os.path.normpath(directory)), own_images))
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isdir(path):
+            images = list_images(path)
+            if images:
+                orders.append((name, images))
+    return orders
+
+def ingest_receipts(paths, args, cache, timer, engine):
+    """One record per receipt image"""
+    texts = iter_ocr_images(paths, preprocess=True, workers=args.workers, cache=cache, timer=timer,
+                            engine=engine, mode=args.ocr_mode, line_ok=receipt_line_ok)
+    for path, text in zip(paths, texts):
+        timer.count('lines', text.count('\n') + 1)
+        with timer.stage('parse'):
+            items, totals = parse_receipt(text)
+        timer.count('items', len(items))
+        yield {'source': path, 'items': items, 'totals': totals}
+
+def ingest_orders(orders, args, cache, timer, engine):
+    """One record per Walmart order (a folder of screenshots)"""
+    for name, paths in orders:
+        texts = ocr_images(paths, preprocess=False, workers=args.workers, cache=cache, timer=timer,
+                           engine=engine, roi=not args.full_screenshots, mode=args.ocr_mode,
+                           line_ok=walmart_line_ok)
+        with timer.stage('parse'):
+            items, totals = parse_walmart_order(texts)
+        timer.count('items', len(items))
+        yield {'source': name, 'images': paths, 'items': items, 'totals': totals}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR a directory of receipts into JSONL")
+    parser.add_argument('directory', help="folder of receipt images (or of Walmart order folders)")
+    parser.add_argument('--type', choices=['receipt', 'walmart'], default='receipt',
+                        help="physical receipts or Walmart app screenshots")
+    parser.add_argument('-o', '--output', help="JSONL file to write (default: stdout)")
+    parser.add_argument('--workers', type=int, default=OCR_WORKERS, help="images OCR'd in parallel")
+    parser.add_argument('--match', action='store_true', help="add FoodKeeper shelf life to each item")
+    parser.add_argument('--full-screenshots', action='store_true',
+                        help="OCR whole Walmart screenshots instead of just their text rows")
+    parser.add_argument('--no-cache', action='store_true', help="always re-run Tesseract")
+    parser.add_argument('--cache-dir', default=OCR_CACHE_DIR, help="OCR result cache directory")
+    parser.add_argument('--metrics', help="also write stage timings and counters here "
+                                          "(Prometheus text for .prom, otherwise JSON)")
+    parser.add_argument('--tesseract-cmd', help="path to the tesseract binary")
+    parser.add_argument('--engine', choices=['auto', 'tesserocr', 'tesserocr-process', 'subprocess'],
+                        default=OCR_ENGINE, help="warm Tesseract workers (in-process or in worker processes) "
+                                                 "or one tesseract process per image")
+    parser.add_argument('--ocr-mode', choices=['full', 'adaptive'], default=OCR_MODE,
+                        help="read each image once, or a half-size copy plus re-reads of unsure lines")
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else OCRCache(args.cache_dir)
+    engine = make_ocr_engine(args.engine, cmd=args.tesseract_cmd)
+    timer = StageTimer()
+    started = time.perf_counter()
+
+    if args.type == 'receipt':
+        sources = list_images(args.directory)
+        records = ingest_receipts(sources, args, cache, timer, engine)
+    else:
+        sources = find_orders(args.directory)
+        records = ingest_orders(sources, args, cache, timer, engine)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    record_count = item_count = 0
+    try:
+        for record in records:
+            if args.match:
+                with timer.stage('match'):
+                    record['items'] = apply_foodkeeper_matching(record['items'])
+            with timer.stage('write'):
+                out.write(json.dumps(record) + '\n')
+            record_count += 1
+            item_count += len(record['items'])
+    finally:
+        engine.close()
+        if out is not sys.stdout:
+            out.close()
+
+    timer.finish()
+    elapsed = time.perf_counter() - started
+    print(f"Ingested {record_count} {'receipts' if args.type == 'receipt' else 'orders'}, "
+          f"{item_count} items in {elapsed:.2f}s", file=sys.stderr)
+    print(timer.report(), file=sys.stderr)
+    if args.metrics:
+        with open(args.metrics, 'w', encoding='utf-8') as f:
+            f.write(timer.to_prometheus() if args.metrics.endswith('.prom') else timer.to_json())
+    if cache is not None:
+        stats = cache.stats()
+        print(f"OCR cache: {stats['hits']} hits / {stats['misses']} misses", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+import streamlit as st
+
+# How often the summary picks up row edits (rows rerun on their own). A fragment can't
+# redraw the summary, and rerunning the page for every qty or price edit rebuilds every
+# row (1.5-2.5 s for 200 items under AppTest), so the summary polls instead: one ~5 ms
+# summary-only rerun per second for each session on Step 1, and a subtotal that lags
+# an edit by up to this long
+SUMMARY_REFRESH = "1s"
+
+
+class ItemEditor:
+    """Step 1 rows keyed by a stable id, with a running subtotal"""
+
+    def __init__(self, items=(), aliases=None):
+        self.rows = {}
+        self.subtotal = 0.0
+        self._next_id = 0
+        for item in items:
+            # Names corrected on an earlier receipt start out corrected
+            corrected = aliases.corrected_name(item['name']) if aliases is not None else None
+            self.add(corrected or item['name'], item['qty'], item['price'] * item['qty'], raw_name=item['name'])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, name, qty, total, raw_name=None):
+        """New row; raw_name is the OCR'd name for scanned rows (None for rows typed in)"""
+        row_id = self._next_id
+        self._next_id += 1
+        self.rows[row_id] = {'name': name, 'qty': qty, 'total': total, 'raw_name': raw_name}
+        self.subtotal += total
+        return row_id
+
+    def update(self, row_id, name, qty, total):
+        """Apply one row's widget values; the subtotal moves by the difference only"""
+        row = self.rows[row_id]
+        self.subtotal += total - row['total']
+        row.update(name=name, qty=qty, total=total)
+
+    def delete(self, row_id):
+        row = self.rows.pop(row_id)
+        self.subtotal -= row['total']
+
+    def items(self):
+        """Edited items in the shape the parsers produce (per-unit price), plus the OCR'd name"""
+        return [{'name': row['name'], 'qty': row['qty'], 'price': row['total'] / row['qty'],
+                 'raw_name': row['raw_name']}
+                for row in self.rows.values()]
+
+
+@st.fragment
+def edit_item_row(row_id):
+    """One editable row - typing or deleting here reruns only this row"""
+    editor = st.session_state.item_editor
+    row = editor.rows.get(row_id)
+    if row is None:
+        return
+
+    col1, col2, col3, col4 = st.columns([5, 2, 2, 1])
+
+    with col1:
+        new_name = st.text_input("Item Name", value=row['name'], key=f"name_{row_id}",
+                                 label_visibility="collapsed", placeholder="Item name")
+
+    with col2:
+        new_qty = st.number_input("Qty", value=row['qty'], min_value=1, key=f"qty_{row_id}",
+                                  label_visibility="collapsed")
+
+    with col3:
+        # Single total price field
+        new_total = st.number_input("Total Price", value=row['total'], min_value=0.01,
+                                    step=0.01, format="%.2f", key=f"total_{row_id}",
+                                    label_visibility="collapsed")
+
+    with col4:
+        # Callback runs before the fragment reruns, which then finds the row gone
+        st.button("🗑️", key=f"del_{row_id}", help="Delete this item",
+                  on_click=editor.delete, args=(row_id,))
+
+    editor.update(row_id, new_name, new_qty, new_total)
+
+
+def _set_editing_totals(editing):
+    st.session_state.editing_totals = editing
+
+
+def _save_tax():
+    st.session_state.totals['tax'] = f"${st.session_state.edit_tax:.2f}"
+    st.session_state.editing_totals = False
+
+
+@st.fragment(run_every=SUMMARY_REFRESH)
+def editor_summary(on_next):
+    """Subtotal, tax and the Next button, read from the editor's running totals"""
+    editor = st.session_state.item_editor
+    col1, col2 = st.columns([3, 1])
+
+    with col1:
+        subtotal = editor.subtotal
+
+        # Initialize editing state
+        if 'editing_totals' not in st.session_state:
+            st.session_state.editing_totals = False
+
+        # Get tax value
+        default_tax = 0.00
+        if st.session_state.totals.get('tax'):
+            default_tax = float(st.session_state.totals['tax'].replace('$', ''))
+
+        # Display mode
+        if not st.session_state.editing_totals:
+            st.write(f"**Subtotal: ${subtotal:.2f}** ({len(editor)} items)")
+            st.write(f"**Tax: ${default_tax:.2f}**")
+            st.write(f"**Grand Total: ${subtotal + default_tax:.2f}**")
+
+            st.button("✏️ Edit Tax", key="enable_edit_tax", on_click=_set_editing_totals, args=(True,))
+
+        # Edit mode
+        else:
+            st.write(f"**Subtotal: ${subtotal:.2f}** ({len(editor)} items)")
+
+            tax_amount = st.number_input(
+                "Tax:",
+                value=default_tax,
+                min_value=0.00,
+                step=0.01,
+                format="%.2f",
+                key="edit_tax"
+            )
+
+            st.write(f"**Grand Total: ${subtotal + tax_amount:.2f}**")
+
+            st.button("✅ Save Tax", key="save_tax", on_click=_save_tax)
+
+    with col2:
+        if len(editor):
+            if st.button("Next: Match Items →", type="primary", use_container_width=True):
+                on_next(editor.items())
+                st.rerun()
+        else:
+            st.button("Next: Match Items →", disabled=True, help="Add at least one item")
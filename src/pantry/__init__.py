@@ -0,0 +1,56 @@
+"""Receipt scanning pipeline shared by the Streamlit app and the batch ingest CLI"""
+
+import importlib
+
+# Public names and the module each comes from. Modules load on first use, so the
+# app can start without importing the OCR stack (NumPy, Tesseract) it needs only to scan
+_EXPORTS = {
+    'AliasStore': 'aliases',
+    'PantryBoard': 'board',
+    'DuplicateIndex': 'dedupe',
+    'get_ocr_engine': 'engine',
+    'make_ocr_engine': 'engine',
+    'ExpiryCalendar': 'expiry',
+    'start_digest_job': 'expiry',
+    'write_digest': 'expiry',
+    'apply_foodkeeper_matching': 'foodkeeper',
+    'fuzzy_match': 'foodkeeper',
+    'get_foodkeeper': 'foodkeeper',
+    'get_shelf_life': 'foodkeeper',
+    'get_shelf_lives': 'foodkeeper',
+    'ScanQueue': 'jobs',
+    'scan_receipts': 'jobs',
+    'scan_walmart': 'jobs',
+    'iter_ocr_images': 'ocr',
+    'ocr_image': 'ocr',
+    'ocr_images': 'ocr',
+    'preprocess_image': 'ocr',
+    'OCRCache': 'ocr_cache',
+    'iter_receipt_items': 'parsing',
+    'iter_stitched_lines': 'parsing',
+    'iter_text_lines': 'parsing',
+    'iter_walmart_items': 'parsing',
+    'parse_receipt': 'parsing',
+    'parse_walmart_order': 'parsing',
+    'receipt_line_ok': 'parsing',
+    'walmart_line_ok': 'parsing',
+    'start_warmup': 'startup',
+    'PantryStore': 'store',
+    'find_tesseract': 'tesseract',
+    'StageTimer': 'timing',
+    'Upload': 'uploads',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
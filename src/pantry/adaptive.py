@@ -0,0 +1,94 @@
+from PIL import Image
+
+from .timing import NULL_TIMER
+
+# Everything that changes an adaptive read - also part of the OCR cache key
+ADAPTIVE_SETTINGS = {
+    # The first pass reads the whole image at this fraction of its size. Tesseract's
+    # LSTM scales every text line to a fixed height anyway, so this mostly saves
+    # layout analysis and still leaves receipt text ~20 px tall
+    'fast_scale': 0.5,
+    # Lines with a word below this confidence (0-100) are read again; above ~30 most
+    # retries just re-read numbers Tesseract got right but wasn't sure of
+    'min_confidence': 20,
+    # Lines are read again from the full-size image, enlarged by this factor
+    'retry_scale': 2.0,
+    # Margin kept around a line's box, as a fraction of its height
+    'line_padding': 0.25,
+    # A re-read crop holds a single line of text
+    'retry_config': '--psm 7',
+}
+
+
+def parse_tsv(tsv):
+    """Text lines of Tesseract TSV output in reading order: key, words, box and lowest confidence"""
+    lines = {}
+    for row in tsv.splitlines():
+        fields = row.split('\t')
+        # Word rows only; the binary's header row and empty words are skipped too
+        if len(fields) < 12 or fields[0] != '5' or not fields[11].strip():
+            continue
+        key = tuple(int(field) for field in fields[1:5])
+        left, top, width, height = (int(field) for field in fields[6:10])
+        line = lines.get(key)
+        if line is None:
+            line = lines[key] = {'key': key, 'words': [], 'box': (left, top, left + width, top + height),
+                                 'confidence': 100.0}
+        line['words'].append(fields[11].strip())
+        box = line['box']
+        line['box'] = (min(box[0], left), min(box[1], top), max(box[2], left + width), max(box[3], top + height))
+        line['confidence'] = min(line['confidence'], float(fields[10]))
+    return list(lines.values())
+
+
+def join_lines(lines):
+    """Text laid out like image_to_string: one line per row, a blank line between paragraphs"""
+    text = []
+    prev_key = None
+    for key, line in lines:
+        if prev_key is not None and key[:3] != prev_key[:3]:
+            text.append('')
+        text.append(line)
+        prev_key = key
+    return ''.join(line + '\n' for line in text)
+
+
+def _line_crop(image, box, scale, settings):
+    """A fast-pass line box cut from the full-size image with some margin, enlarged for the retry"""
+    left, top, right, bottom = (value / scale for value in box)
+    pad = (bottom - top) * settings['line_padding']
+    crop = image.crop((max(0, int(left - pad)), max(0, int(top - pad)),
+                       min(image.width, int(right + pad) + 1), min(image.height, int(bottom + pad) + 1)))
+    if settings['retry_scale'] != 1:
+        crop = crop.resize((max(1, round(crop.width * settings['retry_scale'])),
+                            max(1, round(crop.height * settings['retry_scale']))), Image.BICUBIC)
+    return crop
+
+
+def adaptive_image_to_string(image, engine, config='', line_ok=None, settings=None, timer=NULL_TIMER):
+    """Read a small copy of the image, then re-read low-confidence lines and lines line_ok rejects"""
+    settings = settings or ADAPTIVE_SETTINGS
+    scale = min(1.0, settings['fast_scale'])
+    fast = image
+    if scale < 1:
+        fast = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                            Image.BILINEAR)
+    with timer.stage('ocr_fast'):
+        lines = parse_tsv(engine.image_to_data(fast, config=config))
+    timer.count('ocr_lines', len(lines))
+
+    retry_config = f"{config} {settings['retry_config']}".strip()
+    merged = []
+    for line in lines:
+        text = ' '.join(line['words'])
+        usable = line_ok is None or line_ok(text)
+        if line['confidence'] < settings['min_confidence'] or not usable:
+            timer.count('lines_retried')
+            with timer.stage('ocr_retry'):
+                crop = _line_crop(image, line['box'], scale, settings)
+                retried = ' '.join(engine.image_to_string(crop, config=retry_config).split())
+            # Keep the second reading unless it breaks a line the parser could read
+            if retried and (not usable or line_ok is None or line_ok(retried)):
+                text = retried
+        merged.append((line['key'], text))
+    return join_lines(merged)
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+
+from .db import connect, init_db
+from .matcher import normalize_name
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS aliases (
+    raw TEXT PRIMARY KEY,
+    corrected TEXT NOT NULL,
+    food TEXT,
+    uses INTEGER NOT NULL DEFAULT 1,
+    last_used REAL NOT NULL
+);
+"""
+
+
+class AliasStore:
+    """Learned OCR name -> corrected name -> FoodKeeper food, kept in SQLite and looked up in memory"""
+
+    def __init__(self, path, max_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        init_db(path, SCHEMA)
+        with connect(path) as conn:
+            rows = conn.execute('SELECT raw, corrected, food FROM aliases ORDER BY last_used').fetchall()
+        # Least recently used first, so eviction pops from the front
+        self._aliases = OrderedDict((raw, {'corrected': corrected, 'food': food}) for raw, corrected, food in rows)
+
+    def __len__(self):
+        return len(self._aliases)
+
+    def corrected_name(self, raw_name):
+        """What the user last renamed this OCR'd name to, or None (not counted in the stats)"""
+        with self._lock:
+            alias = self._aliases.get(normalize_name(raw_name))
+        return alias['corrected'] if alias else None
+
+    def lookup(self, raw_name):
+        """{'corrected', 'food'} learned for an OCR'd name, or None"""
+        raw = normalize_name(raw_name)
+        with self._lock:
+            alias = self._aliases.get(raw)
+            if alias is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._aliases.move_to_end(raw)
+            return dict(alias)
+
+    def learn(self, corrections):
+        """Remember (raw name, corrected name, FoodKeeper food or None) edits in one transaction"""
+        now = time.time()
+        rows = [(normalize_name(raw), corrected, food, now) for raw, corrected, food in corrections
+                if normalize_name(raw) != normalize_name(corrected)]
+        if not rows:
+            return 0
+
+        with self._lock:
+            for raw, corrected, food, _ in rows:
+                self._aliases[raw] = {'corrected': corrected, 'food': food}
+                self._aliases.move_to_end(raw)
+            evicted = []
+            while len(self._aliases) > self.max_entries:
+                evicted.append(self._aliases.popitem(last=False)[0])
+
+        with connect(self.path) as conn:
+            conn.executemany(
+                'INSERT INTO aliases (raw, corrected, food, last_used) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (raw) DO UPDATE SET corrected = excluded.corrected, food = excluded.food, '
+                'uses = uses + 1, last_used = excluded.last_used', rows)
+            conn.executemany('DELETE FROM aliases WHERE raw = ?', [(raw,) for raw in evicted])
+        return len(rows)
+
+    def stats(self):
+        """Hit/miss counters since start plus current size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._aliases),
+                'max_entries': self.max_entries,
+            }
@@ -0,0 +1,49 @@
+LOCATIONS = ('unsorted', 'fridge', 'shelf', 'skipped')
+
+# Placed items get their location's FoodKeeper shelf life as the default expiry
+SHELF_LIFE_KEYS = {'fridge': 'shelf_life_fridge', 'shelf': 'shelf_life_shelf'}
+
+
+class PantryBoard:
+    """Step 4 items indexed by storage location, so moves and counts are O(1)"""
+
+    def __init__(self, items):
+        self.items = list(items)
+        # Dicts as insertion-ordered sets of item indexes
+        self.locations = {location: {} for location in LOCATIONS}
+        for idx, item in enumerate(self.items):
+            self.locations.setdefault(item['storage_location'], {})[idx] = None
+
+    def __len__(self):
+        return len(self.items)
+
+    def in_location(self, location):
+        """(index, item) pairs in location, in the order they were moved there"""
+        return [(idx, self.items[idx]) for idx in self.locations.get(location, ())]
+
+    def count(self, location):
+        return len(self.locations.get(location, ()))
+
+    def move(self, idx, location):
+        """Move one item, defaulting its expiry to the new location's shelf life"""
+        item = self.items[idx]
+        self.locations[item['storage_location']].pop(idx, None)
+        self.locations.setdefault(location, {})[idx] = None
+        item['storage_location'] = location
+
+        shelf_life = item.get(SHELF_LIFE_KEYS.get(location))
+        if shelf_life:
+            item['expiry_days'] = shelf_life
+
+    @property
+    def organized(self):
+        """Items that have left the unsorted column"""
+        return len(self.items) - self.count('unsorted')
+
+    @property
+    def all_organized(self):
+        return not self.locations['unsorted']
+
+    def placed_items(self):
+        """Fridge then shelf items - everything that gets saved"""
+        return [item for location in ('fridge', 'shelf') for _, item in self.in_location(location)]
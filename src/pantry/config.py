@@ -0,0 +1,65 @@
+import os
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(os.path.dirname(SRC_DIR), 'Data')
+
+# Number of images OCR'd at once (override with PANTRY_OCR_WORKERS)
+OCR_WORKERS = int(os.environ.get('PANTRY_OCR_WORKERS', min(4, os.cpu_count() or 1)))
+
+# 'tesserocr' (warm in-process workers), 'tesserocr-process' (warm worker processes, for
+# threads that can't load tesserocr), 'subprocess' (tesseract binary per image)
+# or 'auto' for tesserocr when it is installed (override with PANTRY_OCR_ENGINE)
+OCR_ENGINE = os.environ.get('PANTRY_OCR_ENGINE', 'auto')
+
+# Path to the tesseract binary; by default it is looked up on PATH and in the usual
+# install locations (override with PANTRY_TESSERACT_CMD)
+TESSERACT_CMD = os.environ.get('PANTRY_TESSERACT_CMD')
+
+# 'full' reads every image once at full size; 'adaptive' reads a half-size copy and
+# re-reads only unsure or unparseable lines (override with PANTRY_OCR_MODE)
+OCR_MODE = os.environ.get('PANTRY_OCR_MODE', 'full')
+
+# 'pil' enhances the whole photo at full resolution; 'numpy' crops, downscales and deskews
+# it first - faster, but it reads less accurately so far (override with PANTRY_PREPROCESS_ENGINE)
+PREPROCESS_ENGINE = os.environ.get('PANTRY_PREPROCESS_ENGINE', 'pil')
+
+# OCR results are cached under Data/ocr_cache (override with PANTRY_OCR_CACHE_DIR)
+OCR_CACHE_DIR = os.environ.get('PANTRY_OCR_CACHE_DIR', os.path.join(DATA_DIR, 'ocr_cache'))
+
+# Scans running at once per server; later uploads queue behind them (override with PANTRY_SCAN_JOBS)
+SCAN_JOBS = int(os.environ.get('PANTRY_SCAN_JOBS', 2))
+
+# Background scan jobs and their results live in Data/scan_jobs.db (override with PANTRY_SCAN_JOBS_DB)
+SCAN_JOBS_DB_PATH = os.environ.get('PANTRY_SCAN_JOBS_DB', os.path.join(DATA_DIR, 'scan_jobs.db'))
+
+# Perceptual hashes of scanned images, for spotting a receipt uploaded twice, live in
+# Data/scan_history.db (override with PANTRY_SCAN_HISTORY_DB)
+SCAN_HISTORY_DB_PATH = os.environ.get('PANTRY_SCAN_HISTORY_DB', os.path.join(DATA_DIR, 'scan_history.db'))
+
+# Profile scans (and their FoodKeeper matching) with cProfile and tracemalloc, saving the
+# results under Data/profiles; ?profile=1 in the URL does the same for one session
+# (override with PANTRY_PROFILE=1 and PANTRY_PROFILE_DIR)
+PROFILE_SCANS = os.environ.get('PANTRY_PROFILE', '0') == '1'
+PROFILE_DIR = os.environ.get('PANTRY_PROFILE_DIR', os.path.join(DATA_DIR, 'profiles'))
+
+# Profile folders kept there; the oldest are deleted as new ones start (override with PANTRY_PROFILE_KEEP)
+PROFILE_KEEP = int(os.environ.get('PANTRY_PROFILE_KEEP', 20))
+
+# Saved pantry items live in Data/pantry.db (override with PANTRY_DB_PATH)
+PANTRY_DB_PATH = os.environ.get('PANTRY_DB_PATH', os.path.join(DATA_DIR, 'pantry.db'))
+
+# Names users corrected in Step 1, learned for next time, live in Data/aliases.db
+# (override with PANTRY_ALIAS_DB)
+ALIAS_DB_PATH = os.environ.get('PANTRY_ALIAS_DB', os.path.join(DATA_DIR, 'aliases.db'))
+
+# Daily expiry digests are dropped in Data/outbox (override with PANTRY_OUTBOX_DIR)
+OUTBOX_DIR = os.environ.get('PANTRY_OUTBOX_DIR', os.path.join(DATA_DIR, 'outbox'))
+
+# A digest lists items expiring within this many days (override with PANTRY_DIGEST_DAYS)
+DIGEST_DAYS = int(os.environ.get('PANTRY_DIGEST_DAYS', 3))
+
+FOODKEEPER_PATH = os.path.join(SRC_DIR, 'foodkeeper.json')
+
+# foodkeeper.json compiled for lazy lookups; rebuilt whenever the JSON changes
+# (override with PANTRY_FOODKEEPER_DB)
+FOODKEEPER_DB_PATH = os.environ.get('PANTRY_FOODKEEPER_DB', os.path.join(DATA_DIR, 'foodkeeper.db'))
@@ -0,0 +1,29 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+
+@contextmanager
+def connect(path, foreign_keys=False):
+    """Short-lived connection per call (safe across Streamlit and worker threads), committed on success"""
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        if foreign_keys:
+            conn.execute('PRAGMA foreign_keys=ON')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def init_db(path, schema):
+    """Create the database's folder and tables, in WAL mode"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with connect(path) as conn:
+        # WAL lets the UI read while a scan or save is being written
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(schema)
@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+
+from PIL import Image
+
+from .db import connect, init_db
+
+# Gradients are taken on a HASH_SIZE x HASH_SIZE grid, left-right and top-bottom
+HASH_SIZE = 16
+HASH_BITS = 2 * HASH_SIZE * HASH_SIZE
+
+# Hamming distance (out of HASH_BITS) up to which two images count as the same.
+# On the benchmark corpora re-uploads land within ~15 bits and a second photo of
+# a receipt mostly within ~55, while different receipts start around 75; different
+# orders' screenshots share the app layout and start around 35
+DUPLICATE_DISTANCE = {'receipt': 56, 'walmart': 24}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    items TEXT NOT NULL,
+    totals TEXT NOT NULL,
+    image_count INTEGER NOT NULL,
+    scanned_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scan_images (
+    scan_id TEXT NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (scan_id, position)
+);
+"""
+
+
+def _paper(gray):
+    """Crop a photo to the receipt paper, so where it sits in the frame doesn't change the hash"""
+    # NumPy loads with the first upload rather than at startup
+    try:
+        import numpy as np
+    except ImportError:  # NumPy is optional; whole images are hashed then
+        return gray
+    from .preprocess import otsu_threshold
+
+    pixels = np.asarray(gray)
+    paper = pixels > otsu_threshold(pixels)
+    col_fill = paper.mean(axis=0)
+    row_fill = paper.mean(axis=1)
+    cols = np.flatnonzero(col_fill > col_fill.max() / 2)
+    rows = np.flatnonzero(row_fill > row_fill.max() / 2)
+    if not len(cols) or not len(rows):
+        return gray
+    return gray.crop((int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1))
+
+
+def dhash(image, size=HASH_SIZE):
+    """Difference hash: is each cell brighter than its right / lower neighbour, as one int"""
+    gray = _paper(image.convert('L'))
+    wide = gray.resize((size + 1, size), Image.BOX).tobytes()
+    tall = gray.resize((size, size + 1), Image.BOX).tobytes()
+    bits = 0
+    for y in range(size):
+        for x in range(size):
+            bits = (bits << 1) | (wide[y * (size + 1) + x] > wide[y * (size + 1) + x + 1])
+    for y in range(size):
+        for x in range(size):
+            bits = (bits << 1) | (tall[y * size + x] > tall[(y + 1) * size + x])
+    return bits
+
+
+if hasattr(int, 'bit_count'):
+    def hamming(a, b):
+        return (a ^ b).bit_count()
+else:  # Python < 3.10
+    def hamming(a, b):
+        return bin(a ^ b).count('1')
+
+
+class DuplicateIndex:
+    """Perceptual hashes of every scanned image, each pointing at the scan (and parse) it was part of"""
+
+    def __init__(self, path, max_scans=2000):
+        self.path = path
+        self.max_scans = max_scans
+        self._lock = threading.Lock()
+        init_db(path, SCHEMA)
+        with connect(path, foreign_keys=True) as conn:
+            rows = conn.execute('SELECT s.kind, i.hash, i.scan_id, i.position FROM scan_images i '
+                                'JOIN scans s ON s.id = i.scan_id ORDER BY s.scanned_at').fetchall()
+            self._scan_order = [scan_id for (scan_id,) in
+                                conn.execute('SELECT id FROM scans ORDER BY scanned_at')]
+        # A few thousand hashes at most; comparing against each one takes a few milliseconds
+        self._hashes = {}
+        for kind, image_hash, scan_id, position in rows:
+            self._hashes.setdefault(kind, []).append((int(image_hash, 16), scan_id, position))
+
+    def add(self, scan_id, kind, uploads, items, totals):
+        """Remember a finished scan: its uploads' hashes and the items parsed from them"""
+        hashes = [upload.dhash() for upload in uploads]
+        with connect(self.path, foreign_keys=True) as conn:
+            conn.execute('INSERT OR REPLACE INTO scans VALUES (?, ?, ?, ?, ?, ?)',
+                         (scan_id, kind, json.dumps(items), json.dumps(totals), len(hashes), time.time()))
+            conn.executemany('INSERT OR REPLACE INTO scan_images VALUES (?, ?, ?)',
+                             [(scan_id, position, f"{image_hash:x}") for position, image_hash in enumerate(hashes)])
+
+        with self._lock:
+            self._hashes.setdefault(kind, []).extend(
+                (image_hash, scan_id, position) for position, image_hash in enumerate(hashes))
+            self._scan_order.append(scan_id)
+            evicted = self._scan_order[:-self.max_scans] if len(self._scan_order) > self.max_scans else []
+            del self._scan_order[:len(evicted)]
+            if evicted:
+                gone = set(evicted)
+                for entries in self._hashes.values():
+                    entries[:] = [entry for entry in entries if entry[1] not in gone]
+        if evicted:
+            with connect(self.path, foreign_keys=True) as conn:
+                conn.executemany('DELETE FROM scans WHERE id = ?', [(old_id,) for old_id in evicted])
+
+    def find(self, kind, uploads):
+        """Per upload, the closest earlier scanned image within DUPLICATE_DISTANCE, or None"""
+        limit = DUPLICATE_DISTANCE[kind]
+        with self._lock:
+            entries = list(self._hashes.get(kind, ()))
+
+        matches = []
+        for upload in uploads:
+            image_hash = upload.dhash()
+            best = None
+            best_distance = limit + 1
+            for entry in entries:
+                distance = hamming(image_hash, entry[0])
+                if distance < best_distance:
+                    best, best_distance = entry, distance
+            matches.append(best and {'scan_id': best[1], 'position': best[2], 'distance': best_distance})
+        return matches
+
+    def scan(self, scan_id):
+        """An earlier scan's kind, items, totals, image count and time, or None"""
+        with connect(self.path, foreign_keys=True) as conn:
+            row = conn.execute('SELECT kind, items, totals, image_count, scanned_at FROM scans WHERE id = ?',
+                               (scan_id,)).fetchone()
+        if row is None:
+            return None
+        kind, items, totals, image_count, scanned_at = row
+        return {'id': scan_id, 'kind': kind, 'items': json.loads(items), 'totals': json.loads(totals),
+                'image_count': image_count, 'scanned_at': scanned_at}
@@ -0,0 +1,304 @@
+import importlib.util
+import contextlib
+import io
+import logging
+import multiprocessing
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .config import OCR_ENGINE, OCR_WORKERS
+from .tesseract import TesseractError, TesseractNotFound, find_tesseract, subprocess_args
+
+logger = logging.getLogger(__name__)
+
+# tesserocr is imported on first use, once per process: False until tried, then the module or None
+_tesserocr = {'module': False}
+_tesserocr_lock = threading.Lock()
+
+
+def load_tesserocr():
+    """The tesserocr module, or None when it is not installed or can't be loaded here"""
+    with _tesserocr_lock:
+        if _tesserocr['module'] is False:
+            try:
+                import tesserocr
+            except ImportError:  # tesserocr is optional; fall back to the tesseract binary
+                tesserocr = None
+            except ValueError as e:
+                # Its cysignals dependency sets a signal handler, which only the main thread may
+                # do - and Streamlit runs the app (and its scans) on other threads
+                logger.info("tesserocr can't be loaded off the main thread (%s)", e)
+                tesserocr = None
+            _tesserocr['module'] = tesserocr
+        return _tesserocr['module']
+
+
+def tesserocr_installed():
+    """Whether tesserocr is installed, even if this thread can't load it"""
+    return importlib.util.find_spec('tesserocr') is not None
+
+
+def parse_config(config):
+    """Tesseract command-line flags as (lang, oem, psm, variables) for the in-process API"""
+    lang, oem, psm, variables = 'eng', None, None, {}
+    args = shlex.split(config or '', posix=sys.platform != 'win32')
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        value = args[idx + 1] if idx + 1 < len(args) else None
+        if arg == '-l':
+            lang = value
+        elif arg == '--oem':
+            oem = int(value)
+        elif arg == '--psm':
+            psm = int(value)
+        elif arg == '-c' and value and '=' in value:
+            name, _, setting = value.partition('=')
+            variables[name] = setting
+        else:
+            raise ValueError(f"Unsupported Tesseract option for tesserocr: {arg}")
+        idx += 2
+    return lang, oem, psm, variables
+
+
+class SubprocessEngine:
+    """One tesseract process per image, with the image piped through stdin/stdout"""
+
+    name = 'subprocess'
+
+    def __init__(self, cmd=None):
+        # None: PANTRY_TESSERACT_CMD, else whichever tesseract find_tesseract discovers
+        self.cmd = cmd
+
+    def image_to_string(self, image, config=''):
+        return self._run(image, config)
+
+    def image_to_data(self, image, config=''):
+        """Tesseract's TSV output: one row per page, block, paragraph, line and word"""
+        return self._run(image, config, ['tsv'])
+
+    def _run(self, image, config, output=()):
+        # Uncompressed PNG: no temp files and almost no encode time
+        if image.mode not in ('1', 'L', 'RGB', 'RGBA'):
+            image = image.convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', compress_level=0)
+
+        cmd = [find_tesseract(self.cmd)['cmd'], 'stdin', 'stdout']
+        cmd += shlex.split(config or '', posix=sys.platform != 'win32')
+        cmd += list(output)
+        try:
+            proc = subprocess.run(cmd, input=buffer.getvalue(), **subprocess_args())
+        except FileNotFoundError:
+            raise TesseractNotFound(f"{cmd[0]} is no longer there")
+        if proc.returncode:
+            errors = ' '.join(proc.stderr.decode('utf-8', 'replace').split())
+            raise TesseractError(f"Tesseract exited with {proc.returncode}: {errors}")
+        return proc.stdout.decode('utf-8')
+
+    def close(self):
+        pass
+
+
+class TesserocrEngine:
+    """Warm in-process Tesseract APIs, reused across images instead of re-loading traineddata"""
+
+    name = 'tesserocr'
+
+    def __init__(self, size=OCR_WORKERS):
+        self.size = size
+        # One pool per config string - each API is initialised with its config once
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, config):
+        with self._lock:
+            if config not in self._pools:
+                self._pools[config] = {'idle': queue.LifoQueue(), 'created': 0}
+            return self._pools[config]
+
+    def _acquire(self, config):
+        pool = self._pool(config)
+        try:
+            return pool['idle'].get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = pool['created'] < self.size
+            if create:
+                pool['created'] += 1
+        if not create:
+            # Every API for this config is busy; wait for one to come back
+            return pool['idle'].get()
+
+        lang, oem, psm, variables = parse_config(config)
+        kwargs = {'lang': lang, 'variables': variables}
+        if oem is not None:
+            kwargs['oem'] = oem
+        if psm is not None:
+            kwargs['psm'] = psm
+        try:
+            return load_tesserocr().PyTessBaseAPI(**kwargs)
+        except Exception:
+            with self._lock:
+                pool['created'] -= 1
+            raise
+
+    def image_to_string(self, image, config=''):
+        return self._run(image, config, lambda api: api.GetUTF8Text())
+
+    def image_to_data(self, image, config=''):
+        """Tesseract's TSV output (without the header row the binary prints)"""
+        return self._run(image, config, lambda api: api.GetTSVText(0))
+
+    def _run(self, image, config, read):
+        api = self._acquire(config)
+        try:
+            # Recognition releases the GIL, so pooled APIs run in parallel threads
+            api.SetImage(image)
+            return read(api)
+        finally:
+            api.Clear()
+            self._pool(config)['idle'].put(api)
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            while True:
+                try:
+                    pool['idle'].get_nowait().End()
+                except queue.Empty:
+                    break
+
+
+# The warm engine of a worker process started by TesserocrProcessEngine
+_worker = {'engine': None}
+
+
+def _start_worker():
+    # A worker runs on its own main thread, so tesserocr (and cysignals) load fine here
+    _worker['engine'] = TesserocrEngine(size=1)
+
+
+def _worker_ready():
+    pass
+
+
+def _worker_read(image, config, tsv):
+    engine = _worker['engine']
+    return engine.image_to_data(image, config) if tsv else engine.image_to_string(image, config)
+
+
+@contextlib.contextmanager
+def _hidden_main():
+    """Hide the running script from workers spawned meanwhile, which would otherwise re-run it first
+
+    Streamlit installs the app script as __main__, so a worker would start by running the whole app.
+    """
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+
+class TesserocrProcessEngine:
+    """Warm tesserocr APIs in worker processes, for threads that can't load tesserocr themselves"""
+
+    name = 'tesserocr-process'
+
+    def __init__(self, size=OCR_WORKERS):
+        self.size = size
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawned rather than forked: the app's threads (and their locks) stay behind
+                executor = ProcessPoolExecutor(self.size, mp_context=multiprocessing.get_context('spawn'),
+                                               initializer=_start_worker)
+                # A spawn pool starts a worker per submit until it has them all - start them now
+                with _hidden_main():
+                    for _ in range(self.size):
+                        executor.submit(_worker_ready)
+                self._executor = executor
+            return self._executor
+
+    def image_to_string(self, image, config=''):
+        return self._run(image, config, False)
+
+    def image_to_data(self, image, config=''):
+        """Tesseract's TSV output (without the header row the binary prints)"""
+        return self._run(image, config, True)
+
+    def _run(self, image, config, tsv):
+        executor = self._pool()
+        try:
+            return executor.submit(_worker_read, image, config, tsv).result()
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start fresh ones for the next image
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            raise
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+ENGINES = {'subprocess': SubprocessEngine, 'tesserocr': TesserocrEngine,
+           'tesserocr-process': TesserocrProcessEngine}
+
+
+def resolve_engine(name=OCR_ENGINE):
+    """Engine make_ocr_engine builds for name: 'tesserocr', 'tesserocr-process' or 'subprocess'"""
+    if name in ('auto', 'tesserocr') and load_tesserocr() is None and tesserocr_installed():
+        # Installed but not loadable on this thread (e.g. Streamlit's): warm worker processes instead
+        return 'tesserocr-process'
+    if name == 'auto':
+        name = 'tesserocr' if load_tesserocr() is not None else 'subprocess'
+    if name == 'tesserocr' and load_tesserocr() is None:
+        logger.warning("tesserocr is not installed; running the tesseract binary per image instead")
+        name = 'subprocess'
+    if name == 'tesserocr-process' and not tesserocr_installed():
+        logger.warning("tesserocr is not installed; running the tesseract binary per image instead")
+        name = 'subprocess'
+    return name
+
+
+def make_ocr_engine(name=OCR_ENGINE, cmd=None):
+    """'tesserocr', 'tesserocr-process', 'subprocess' or 'auto' (tesserocr when installed)
+
+    cmd is the tesseract binary the subprocess engine runs; tesserocr links libtesseract instead.
+    """
+    name = resolve_engine(name)
+    if name == 'subprocess':
+        return SubprocessEngine(cmd)
+    return ENGINES[name]()
+
+
+# Shared by every scan so the warm workers outlive Streamlit reruns
+_engine = {'engine': None}
+_engine_lock = threading.Lock()
+
+
+def get_ocr_engine():
+    """Process-wide OCR engine, created on first use"""
+    with _engine_lock:
+        if _engine['engine'] is None:
+            _engine['engine'] = make_ocr_engine()
+        return _engine['engine']
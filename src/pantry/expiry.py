@@ -0,0 +1,127 @@
+import bisect
+import logging
+import os
+import threading
+from datetime import date, timedelta
+
+logger = logging.getLogger(__name__)
+
+# How often the background digest job wakes up; it writes at most one digest a day
+DIGEST_CHECK_SECONDS = 3600
+
+
+class ExpiryCalendar:
+    """Saved pantry items bucketed by expiry date, with the dates kept sorted"""
+
+    def __init__(self, items=()):
+        self.buckets = {}
+        # Distinct expiry dates only (a few hundred at most), so bisect inserts stay cheap
+        self.dates = []
+        self._expiry_of = {}
+        self._lock = threading.Lock()
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self._expiry_of)
+
+    def add(self, item):
+        """Schedule a saved item (one with an id and expiry_date); re-adding reschedules it"""
+        day = date.fromisoformat(item['expiry_date'])
+        with self._lock:
+            self._discard(item['id'])
+            bucket = self.buckets.get(day)
+            if bucket is None:
+                bucket = self.buckets[day] = {}
+                bisect.insort(self.dates, day)
+            bucket[item['id']] = item
+            self._expiry_of[item['id']] = day
+
+    def remove(self, item_id):
+        with self._lock:
+            self._discard(item_id)
+
+    def _discard(self, item_id):
+        day = self._expiry_of.pop(item_id, None)
+        if day is None:
+            return
+        bucket = self.buckets[day]
+        del bucket[item_id]
+        if not bucket:
+            del self.buckets[day]
+            del self.dates[bisect.bisect_left(self.dates, day)]
+
+    def until(self, cutoff, storage_location=None):
+        """Items expiring on or before cutoff (expired ones included), soonest first"""
+        with self._lock:
+            days = self.dates[:bisect.bisect_right(self.dates, cutoff)]
+            items = [item for day in days for _, item in sorted(self.buckets[day].items())]
+        if storage_location:
+            items = [item for item in items if item['storage_location'] == storage_location]
+        return items
+
+    def expiring_within(self, days, today=None, storage_location=None):
+        """Same answer as PantryStore.expiring_within, without touching the database"""
+        today = today or date.today()
+        return self.until(today + timedelta(days=days), storage_location)
+
+
+def format_digest(items, today):
+    """Plain-text digest: expired items first, then one heading per expiry date"""
+    lines = [f"Pantry expiry digest for {today:%b %d, %Y}", ""]
+    expired = [item for item in items if date.fromisoformat(item['expiry_date']) < today]
+    if expired:
+        lines.append("Already expired:")
+        lines += [f"  - {item['name']} ({item['storage_location']}, {item['expiry_date']})" for item in expired]
+        lines.append("")
+
+    current_day = None
+    for item in items:
+        day = date.fromisoformat(item['expiry_date'])
+        if day < today:
+            continue
+        if day != current_day:
+            current_day = day
+            label = "Today" if day == today else f"{day:%a %b %d}"
+            lines.append(f"{label}:")
+        lines.append(f"  - {item['name']} ({item['storage_location']})")
+    return '\n'.join(lines) + '\n'
+
+
+def write_digest(calendar, outbox_dir, days, today=None):
+    """Write today's digest to the outbox once; returns its path, or None if nothing to send"""
+    today = today or date.today()
+    path = os.path.join(outbox_dir, f"expiry-digest-{today.isoformat()}.txt")
+    if os.path.exists(path):
+        return None
+    items = calendar.expiring_within(days, today)
+    if not items:
+        return None
+
+    os.makedirs(outbox_dir, exist_ok=True)
+    # Write then rename so a reader never sees a half-written digest
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(format_digest(items, today))
+    os.replace(tmp_path, path)
+    return path
+
+
+def start_digest_job(store, outbox_dir, days, interval=DIGEST_CHECK_SECONDS):
+    """Daemon thread that drops a digest in the outbox each day something is about to expire"""
+    stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            try:
+                path = write_digest(store.calendar(), outbox_dir, days)
+                if path:
+                    logger.info("Wrote expiry digest %s", path)
+            except Exception:
+                logger.exception("Expiry digest failed")
+            stop.wait(interval)
+
+    thread = threading.Thread(target=run, name='expiry-digest', daemon=True)
+    thread.stop = stop.set
+    thread.start()
+    return thread
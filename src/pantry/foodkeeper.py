@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from .config import FOODKEEPER_DB_PATH, FOODKEEPER_PATH
+from .foodkeeper_db import SCHEMA_VERSION, FoodKeeperDB, artifact_version, compile_foodkeeper
+from .matcher import FoodMatcher, normalize_name
+
+logger = logging.getLogger(__name__)
+
+def foodkeeper_version(path=FOODKEEPER_PATH):
+    """Changes whenever foodkeeper.json is edited, so cached lookups get rebuilt"""
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def load_foodkeeper(path=FOODKEEPER_PATH):
+    """Load FoodKeeper database with shelf life info"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {food['name'].lower(): food for food in data['foods']}
+    except Exception:
+        logger.warning("Could not load FoodKeeper database from %s; using default shelf life estimates", path)
+        return {}
+
+def open_foodkeeper(path=FOODKEEPER_PATH, db_path=FOODKEEPER_DB_PATH):
+    """FoodKeeper foods from the compiled artifact (recompiled when the JSON changed), else the JSON"""
+    version = foodkeeper_version(path)
+    if version is not None and artifact_version(db_path) != (SCHEMA_VERSION, list(version)):
+        try:
+            compile_foodkeeper(path, db_path, list(version))
+        except Exception:
+            logger.warning("Could not compile %s into %s; reading the JSON directly", path, db_path)
+            return load_foodkeeper(path)
+    
+    # No JSON but a shipped artifact is fine too
+    try:
+        return FoodKeeperDB(db_path)
+    except sqlite3.Error:
+        return load_foodkeeper(path)
+
+# Foods + matcher for the last seen version of foodkeeper.json; module state
+# outlives Streamlit reruns, so the index and its match memo are built once
+_loaded = {'version': None, 'foods': {}, 'matcher': None}
+_load_lock = threading.Lock()
+
+def get_foodkeeper():
+    """FoodKeeper foods and name matcher, rebuilt only when foodkeeper.json changes"""
+    version = foodkeeper_version()
+    with _load_lock:
+        if _loaded['matcher'] is None or _loaded['version'] != version:
+            previous = _loaded['foods']
+            foods = open_foodkeeper()
+            # The artifact stores the matcher's name index; the JSON fallback builds it here
+            _loaded.update(version=version, foods=foods,
+                           matcher=FoodMatcher(foods, index=getattr(foods, 'name_index', None)))
+            # A replaced artifact's SQLite connection would otherwise stay open
+            if isinstance(previous, FoodKeeperDB):
+                previous.close()
+        return _loaded['foods'], _loaded['matcher']
+
+def fuzzy_match(item_name, threshold=0.6):
+    """Match item name to FoodKeeper database using fuzzy string matching"""
+    item_lower = normalize_name(item_name)
+    
+    # Substring match wins first, then fuzzy matching over the indexed shortlist
+    _, matcher = get_foodkeeper()
+    return matcher.match(item_lower, threshold)
+
+def get_shelf_life(item_name):
+    """Get shelf life data for an item"""
+    return shelf_life_from_match(fuzzy_match(item_name))
+
+def get_shelf_lives(item_names):
+    """Get shelf life data for many items, matching each distinct name only once"""
+    _, matcher = get_foodkeeper()
+    return [shelf_life_from_match(food_data) for food_data in matcher.match_many(item_names)]
+
+def shelf_life_from_match(food_data):
+    """Shelf life fields for a FoodKeeper record, or defaults when nothing matched"""
+    if food_data:
+        return {
+            'found': True,
+            'category': food_data.get('category', 'unknown'),
+            'recommended_storage': food_data.get('recommended_storage', 'shelf'),
+            'shelf_life_fridge': food_data.get('shelf_life_fridge'),
+            'shelf_life_shelf': food_data.get('shelf_life_shelf'),
+            'tips': food_data.get('tips', '')
+        }
+    else:
+        return {
+            'found': False,
+            'category': 'unknown',
+            'recommended_storage': 'shelf',
+            'shelf_life_fridge': 7,
+            'shelf_life_shelf': 7,
+            'tips': 'No specific data found. Using default estimate.'
+        }
+
+def match_with_aliases(items, aliases):
+    """FoodKeeper record per item - learned aliases first, the matcher only for the rest"""
+    foods, matcher = get_foodkeeper()
+    matches = [None] * len(items)
+    unmatched = []
+    for idx, item in enumerate(items):
+        # An alias only counts while the item still carries the name it was corrected to
+        alias = aliases.lookup(item.get('raw_name') or item['name'])
+        if alias and alias['food'] in foods and normalize_name(alias['corrected']) == normalize_name(item['name']):
+            matches[idx] = foods[alias['food']]
+        else:
+            unmatched.append(idx)
+    
+    for idx, food_data in zip(unmatched, matcher.match_many([items[idx]['name'] for idx in unmatched])):
+        matches[idx] = food_data
+    
+    # Rows renamed in Step 1 teach the store what this OCR text really was
+    aliases.learn([
+        (item['raw_name'], item['name'], food_data['name'].lower() if food_data else None)
+        for item, food_data in zip(items, matches) if item.get('raw_name')
+    ])
+    return matches
+
+def apply_foodkeeper_matching(items, aliases=None):
+    """Apply FoodKeeper matching to cleaned items after user edits (learned aliases first when given)"""
+    matched_items = []
+    if aliases is not None:
+        shelf_lives = [shelf_life_from_match(food_data) for food_data in match_with_aliases(items, aliases)]
+    else:
+        shelf_lives = get_shelf_lives([item['name'] for item in items])
+    for item, shelf_data in zip(items, shelf_lives):
+        matched_items.append({
+            'name': item['name'],
+            'price': f"${item['price']:.2f}",
+            'qty': item['qty'],
+            'category': shelf_data['category'],
+            'category_display': shelf_data.get('category', 'unknown'),
+            'recommended_storage': shelf_data['recommended_storage'],
+            'shelf_life_fridge': shelf_data['shelf_life_fridge'],
+            'shelf_life_shelf': shelf_data['shelf_life_shelf'],
+            'tips': shelf_data['tips'],
+            'storage_location': 'unsorted',
+            'expiry_days': None,
+            'is_produce': shelf_data['found']
+        })
+    return matched_items
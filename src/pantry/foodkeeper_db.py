@@ -0,0 +1,166 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from array import array
+from collections.abc import Mapping
+from functools import lru_cache
+from pathlib import Path
+
+from .matcher import index_names
+
+# Bump when the artifact layout changes, so old builds get recompiled
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE foods (
+    position INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    record TEXT NOT NULL
+);
+CREATE TABLE postings (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+"""
+
+# Read-only artifact: let SQLite map it instead of copying pages into its cache
+MMAP_BYTES = 256 * 1024 * 1024
+
+# Posting lists of the matcher's name index kept decoded; a lookup reads about 30
+POSTINGS_CACHE = 8192
+
+
+def _read_only_uri(db_path):
+    return Path(os.path.abspath(db_path)).as_uri() + '?mode=ro'
+
+
+def _pack_positions(positions):
+    """Food positions as little-endian 32-bit ints"""
+    packed = array('i', positions)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack_positions(blob):
+    positions = array('i')
+    positions.frombytes(blob)
+    if sys.byteorder == 'big':
+        positions.byteswap()
+    return positions
+
+
+def compile_foodkeeper(json_path, db_path, source_version=None):
+    """Compile foodkeeper.json into a SQLite artifact (names in file order, records as JSON, name index)"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Build beside the target and swap it in, so readers never see a partial file
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        # Same name -> record semantics as the JSON loader (first position, last record wins)
+        foods = {food['name'].lower(): food for food in data['foods']}
+        conn.executemany('INSERT INTO foods VALUES (?, ?, ?)',
+                         ((position, name, json.dumps(food)) for position, (name, food) in enumerate(foods.items())))
+        # The matcher's index, so opening the artifact doesn't rebuild it from every name
+        conn.executemany('INSERT INTO postings VALUES (?, ?, ?)', (
+            (kind, str(key), _pack_positions(positions))
+            for kind, lists in index_names(list(foods)).items() for key, positions in lists.items()))
+        conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('schema_version', str(SCHEMA_VERSION)),
+            ('source_version', json.dumps(source_version)),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    return len(foods)
+
+
+def artifact_version(db_path):
+    """(schema version, source version) stored in an artifact, or None if unreadable"""
+    try:
+        conn = sqlite3.connect(_read_only_uri(db_path), uri=True)
+        try:
+            meta = dict(conn.execute('SELECT key, value FROM meta').fetchall())
+        finally:
+            conn.close()
+        return int(meta['schema_version']), json.loads(meta['source_version'])
+    except (sqlite3.Error, KeyError, ValueError):
+        return None
+
+
+class StoredNameIndex:
+    """The matcher's name index (see matcher.NameIndex) read from the artifact one posting list at a time"""
+
+    def __init__(self, db, cache_size=POSTINGS_CACHE):
+        self._db = db
+        with db._lock:
+            self._lengths = [int(key) for (key,) in db._conn.execute(
+                "SELECT key FROM postings WHERE kind = 'length'")]
+        self._load = lru_cache(maxsize=cache_size)(self._load_postings)
+
+    def _load_postings(self, kind, key):
+        with self._db._lock:
+            row = self._db._conn.execute('SELECT positions FROM postings WHERE kind = ? AND key = ?',
+                                         (kind, key)).fetchone()
+        return _unpack_positions(row[0]) if row else ()
+
+    def postings(self, kind, key):
+        return self._load(kind, str(key))
+
+    def lengths(self):
+        return list(self._lengths)
+
+
+class FoodKeeperDB(Mapping):
+    """Read-only FoodKeeper mapping: names load up front, records and name index postings on first lookup"""
+
+    def __init__(self, db_path, record_cache=1024):
+        self.path = db_path
+        self._conn = sqlite3.connect(_read_only_uri(db_path), uri=True, check_same_thread=False)
+        self._conn.execute(f'PRAGMA mmap_size={MMAP_BYTES}')
+        self._lock = threading.Lock()
+        self._names = [name for (name,) in self._conn.execute('SELECT name FROM foods ORDER BY position')]
+        self._name_set = set(self._names)
+        self._record = lru_cache(maxsize=record_cache)(self._load_record)
+        self.name_index = StoredNameIndex(self)
+
+    def _load_record(self, name):
+        with self._lock:
+            row = self._conn.execute('SELECT record FROM foods WHERE name = ?', (name,)).fetchone()
+        return json.loads(row[0])
+
+    def __getitem__(self, name):
+        if name not in self._name_set:
+            raise KeyError(name)
+        return self._record(name)
+
+    def __contains__(self, name):
+        return name in self._name_set
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def keys(self):
+        return list(self._names)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
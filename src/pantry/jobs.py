@@ -0,0 +1,255 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from .db import connect, init_db
+from .parsing import iter_stitched_lines, iter_walmart_items, parse_receipt, receipt_line_ok, walmart_line_ok
+from .profiling import Profiler
+from .timing import NULL_TIMER, StageTimer
+from .uploads import as_upload
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL,
+    items TEXT NOT NULL DEFAULT '[]',
+    totals TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scan_jobs_status ON scan_jobs (status, created_at);
+"""
+
+COLUMNS = ['id', 'kind', 'status', 'done', 'total', 'items', 'totals', 'error', 'created_at', 'updated_at']
+
+# Jobs in these states are finished; anything else is still owned by a worker
+FINISHED = ('done', 'failed', 'cancelled')
+
+# Partial items are written back at most this often while a scan runs
+PROGRESS_INTERVAL = 0.5
+
+# Finished jobs older than this are dropped when the queue starts
+JOB_RETENTION_SECONDS = 24 * 3600
+
+
+def scan_receipts(images, totals, timer=NULL_TIMER, **ocr_options):
+    """Yield the items of each receipt photo as soon as it is read, summing tax into totals"""
+    # The OCR stack (NumPy, Pillow filters, Tesseract) loads with the first scan, not at startup
+    from .ocr import iter_ocr_images
+
+    texts = iter_ocr_images(images, preprocess=True, timer=timer, line_ok=receipt_line_ok, **ocr_options)
+    for text in timer.timed(texts, 'ocr_wait'):
+        timer.count('lines', text.count('\n') + 1)
+        with timer.stage('parse'):
+            items, receipt_totals = parse_receipt(text)
+        timer.count('items', len(items))
+
+        # Combine taxes from multiple receipts
+        if receipt_totals.get('tax'):
+            tax_val = float(receipt_totals['tax'].replace('$', ''))
+            current_tax = float(totals.get('tax', '$0.00').replace('$', ''))
+            totals['tax'] = f"${current_tax + tax_val:.2f}"
+        yield from items
+
+
+def scan_walmart(images, totals, timer=NULL_TIMER, **ocr_options):
+    """Yield the items of one Walmart order while later screenshots are still being read"""
+    from .ocr import iter_ocr_images
+
+    texts = iter_ocr_images(images, preprocess=False, roi=True, timer=timer, line_ok=walmart_line_ok,
+                            **ocr_options)
+    # Each stage below is timed without the stages it waits on
+    lines = timer.timed(iter_stitched_lines(timer.timed(texts, 'ocr_wait')), 'stitch', counter='lines')
+    totals['walmart_order'] = True
+    totals['items_count'] = 0
+    for item in timer.timed(iter_walmart_items(lines), 'parse', counter='items'):
+        totals['items_count'] += 1
+        yield item
+
+
+SCANNERS = {'receipt': scan_receipts, 'walmart': scan_walmart}
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _Job:
+    """In-memory side of a queued scan: the uploads, its timer, the cancel flag and any profile"""
+
+    def __init__(self, job_id, kind, images, profile_dir=None):
+        self.id = job_id
+        self.kind = kind
+        self.images = images
+        self.timer = StageTimer()
+        self.cancelled = threading.Event()
+        self.finished_at = None
+        self.profile_dir = profile_dir
+        self.profile = None
+
+
+class ScanQueue:
+    """Background scan jobs run by a fixed number of workers, with their state kept in SQLite"""
+
+    def __init__(self, path, workers, cache=None, engine=None, on_done=None):
+        self.path = path
+        self.cache = cache
+        self.engine = engine
+        # Called as on_done(job_id, kind, uploads, items, totals) when a scan completes
+        self.on_done = on_done
+        self._jobs = {}
+        self._lock = threading.Lock()
+        init_db(path, SCHEMA)
+        with connect(path) as conn:
+            # Jobs a previous server left behind have lost their uploads
+            conn.execute("UPDATE scan_jobs SET status = 'failed', error = ?, updated_at = ? "
+                         "WHERE status NOT IN (?, ?, ?)",
+                         ("The server restarted before this scan finished", time.time()) + FINISHED)
+            conn.execute('DELETE FROM scan_jobs WHERE updated_at < ?', (time.time() - JOB_RETENTION_SECONDS,))
+
+        # The pool size is the per-server cap: extra jobs wait their turn as 'queued'
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scan-job')
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with connect(self.path) as conn:
+            conn.execute(f"UPDATE scan_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def submit(self, kind, img_files, profile_dir=None):
+        """Queue a scan of uploaded images ('receipt' or 'walmart') and return its job id at once"""
+        if kind not in SCANNERS:
+            raise ValueError(f"Unknown scan kind: {kind}")
+        # Hold on to the bytes (and any image already decoded for the preview);
+        # the uploader can let go of them before this job runs
+        images = [as_upload(img_file) for img_file in img_files]
+        # With profile_dir the scan runs under cProfile and tracemalloc, saving both there
+        job = _Job(uuid.uuid4().hex, kind, images, profile_dir)
+        now = time.time()
+        with connect(self.path) as conn:
+            conn.execute('INSERT INTO scan_jobs (id, kind, status, total, created_at, updated_at) '
+                         "VALUES (?, ?, 'queued', ?, ?, ?)", (job.id, kind, len(images), now, now))
+        with self._lock:
+            # Keep timers of finished jobs only as long as their rows
+            for old_id, old_job in list(self._jobs.items()):
+                if old_job.finished_at and now - old_job.finished_at > JOB_RETENTION_SECONDS:
+                    del self._jobs[old_id]
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        return job.id
+
+    def get(self, job_id):
+        """Job state with partial items (and its place in line while queued), or None"""
+        with connect(self.path) as conn:
+            row = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM scan_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = dict(zip(COLUMNS, row))
+            if job['status'] == 'queued':
+                job['position'] = conn.execute(
+                    "SELECT COUNT(*) FROM scan_jobs WHERE status = 'queued' AND created_at < ?",
+                    (job['created_at'],)).fetchone()[0] + 1
+        job['items'] = json.loads(job['items'])
+        job['totals'] = json.loads(job['totals'])
+        return job
+
+    def timer(self, job_id):
+        """Stage timings of a job run by this server, or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.timer if job else None
+
+    def profile(self, job_id):
+        """Profile summary of a job run with profile_dir by this server, or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.profile if job else None
+
+    def cancel(self, job_id):
+        """Ask a queued or running job to stop; items found so far are kept"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            job.cancelled.set()
+        # Still waiting for a worker: nothing to wind down, so it is cancelled right away
+        with connect(self.path) as conn:
+            conn.execute("UPDATE scan_jobs SET status = 'cancelled', updated_at = ? "
+                         "WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+
+    def active(self):
+        """Number of jobs queued or running"""
+        with connect(self.path) as conn:
+            return conn.execute('SELECT COUNT(*) FROM scan_jobs WHERE status NOT IN (?, ?, ?)',
+                                FINISHED).fetchone()[0]
+
+    def _run(self, job):
+        if job.cancelled.is_set():
+            self._finish(job, 'cancelled')
+            return
+        self._update(job.id, status='running')
+
+        items = []
+        totals = {}
+        done = 0
+        last_flush = 0.0
+
+        def flush(force=False):
+            nonlocal last_flush
+            if force or time.perf_counter() - last_flush >= PROGRESS_INTERVAL:
+                last_flush = time.perf_counter()
+                self._update(job.id, done=done, items=json.dumps(items), totals=json.dumps(totals))
+
+        def on_progress(count, total):
+            nonlocal done
+            done = count
+            # Runs on this job's thread between images, so a cancel lands within one image
+            if job.cancelled.is_set():
+                raise _Cancelled()
+            flush()
+
+        # cProfile follows this thread: OCR on the image workers shows up as ocr_wait
+        profiler = Profiler(job.profile_dir, 'scan') if job.profile_dir else nullcontext()
+        status, error = 'done', None
+        try:
+            with profiler:
+                scanner = SCANNERS[job.kind](job.images, totals, timer=job.timer, on_progress=on_progress,
+                                             cache=self.cache, engine=self.engine)
+                for item in scanner:
+                    items.append(item)
+                    if job.cancelled.is_set():
+                        raise _Cancelled()
+                    flush()
+        except _Cancelled:
+            status = 'cancelled'
+        except Exception as e:
+            logger.exception("Scan job %s failed", job.id)
+            status, error = 'failed', str(e)
+        job.profile = getattr(profiler, 'summary', None)
+        self._finish(job, status, items, totals, done, error)
+
+    def _finish(self, job, status, items=(), totals=None, done=0, error=None):
+        job.timer.finish()
+        if status == 'done' and self.on_done is not None:
+            try:
+                self.on_done(job.id, job.kind, job.images, items, totals)
+            except Exception:
+                logger.exception("on_done hook failed for scan job %s", job.id)
+        job.images = None
+        job.finished_at = time.time()
+        self._update(job.id, status=status, done=done, items=json.dumps(list(items)),
+                     totals=json.dumps(totals or {}), error=error)
+
+    def shutdown(self):
+        for job in list(self._jobs.values()):
+            job.cancelled.set()
+        self._executor.shutdown(wait=True)
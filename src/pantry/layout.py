@@ -0,0 +1,85 @@
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; screenshots are then OCR'd whole
+    np = None
+
+# Everything that changes which screenshot regions get OCR'd - also part of the OCR cache key
+ROI_SETTINGS = {
+    # Phone status bar (clock, battery) across the top of the screen
+    'status_bar': 0.04,
+    # Gray-level distance from the background that counts as ink
+    'ink_contrast': 64,
+    # Rows/columns of ink closer than this (fraction of the screenshot width) join up
+    'row_gap': 0.006,
+    'column_gap': 0.03,
+    # Blocks more filled than this are product pictures, icons or filled buttons, not text
+    'max_fill': 0.45,
+    # Blank space kept between stacked text rows, as a fraction of a typical row height
+    'line_spacing': 0.5,
+}
+
+
+def _runs(mask, min_gap=1):
+    """(start, end) of runs of True, joining runs separated by fewer than min_gap False values"""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    runs = []
+    for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+        if runs and start - runs[-1][1] < min_gap:
+            runs[-1] = (runs[-1][0], end)
+        else:
+            runs.append((start, end))
+    return runs
+
+
+def find_text_rows(pixels, background, settings=None):
+    """[(top, bottom, [(left, right), ...])] for each band of text rows, pictures left out"""
+    settings = settings or ROI_SETTINGS
+    height, width = pixels.shape
+    ink = np.abs(pixels.astype(np.int16) - background) > settings['ink_contrast']
+    ink[:int(height * settings['status_bar'])] = False
+
+    text_rows = []
+    for top, bottom in _runs(ink.any(axis=1), max(1, int(width * settings['row_gap']))):
+        band = ink[top:bottom]
+        segments = []
+        for left, right in _runs(band.any(axis=0), max(1, int(width * settings['column_gap']))):
+            # Strokes of text leave most of their box blank; pictures and buttons don't
+            if band[:, left:right].mean() <= settings['max_fill']:
+                segments.append((left, right))
+        if segments:
+            text_rows.append((top, bottom, segments))
+    return text_rows
+
+
+def crop_text_rows(image, settings=None):
+    """Screenshot cut down to its text rows, stacked top to bottom in reading order"""
+    settings = settings or ROI_SETTINGS
+    if np is None:
+        return image
+
+    gray = image.convert('L')
+    pixels = np.asarray(gray)
+    # Most common gray level is the app background (light or dark mode)
+    histogram = gray.histogram()
+    background = histogram.index(max(histogram))
+    text_rows = find_text_rows(pixels, background, settings)
+    if not text_rows:
+        return image
+
+    left = min(segments[0][0] for _, _, segments in text_rows)
+    right = max(segments[-1][1] for _, _, segments in text_rows)
+    row_height = int(np.median([bottom - top for top, bottom, _ in text_rows]))
+    spacing = max(2, int(row_height * settings['line_spacing']))
+
+    # Pictures inside a kept band stay behind as background
+    height = sum(bottom - top for top, bottom, _ in text_rows) + spacing * (len(text_rows) + 1)
+    stacked = Image.new('L', (right - left + 2 * spacing, height), background)
+    y = spacing
+    for top, bottom, segments in text_rows:
+        for seg_left, seg_right in segments:
+            stacked.paste(gray.crop((seg_left, top, seg_right, bottom)), (seg_left - left + spacing, y))
+        y += bottom - top + spacing
+    return stacked
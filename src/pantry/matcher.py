@@ -0,0 +1,192 @@
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+
+def normalize_name(item_name):
+    """Lowercase/strip an item name the same way fuzzy_match always has"""
+    return item_name.lower().strip()
+
+
+def _trigrams(text):
+    """Plain character trigrams of text"""
+    return {text[i:i+3] for i in range(len(text) - 2)}
+
+
+def _padded_trigrams(text):
+    """Trigrams with word-boundary padding so short names still share grams"""
+    return _trigrams(f"  {text} ")
+
+
+def index_names(names):
+    """Posting lists over names, positions ascending: {'first': ..., 'gram': ..., 'padded': ..., 'length': ...}
+
+    'first' maps a name's first trigram to it (names of 3+ characters), 'gram' and
+    'padded' every plain and padded trigram, and 'length' the name's length.
+    """
+    postings = {kind: defaultdict(list) for kind in ('first', 'gram', 'padded', 'length')}
+    for idx, name in enumerate(names):
+        if len(name) >= 3:
+            postings['first'][name[:3]].append(idx)
+        for gram in _trigrams(name):
+            postings['gram'][gram].append(idx)
+        for gram in _padded_trigrams(name):
+            postings['padded'][gram].append(idx)
+        postings['length'][len(name)].append(idx)
+    return postings
+
+
+class NameIndex:
+    """Trigram postings and length buckets over food names, built in memory"""
+
+    def __init__(self, names):
+        self._postings = index_names(names)
+
+    def postings(self, kind, key):
+        """Positions of the names under key in one of index_names' kinds"""
+        return self._postings[kind].get(key, ())
+
+    def lengths(self):
+        """Every name length in the index"""
+        return list(self._postings['length'])
+
+
+class FoodMatcher:
+    """Trigram index over FoodKeeper names, built once (or read from an artifact) and queried per item"""
+
+    def __init__(self, foods, memo_size=4096, index=None):
+        self.foods = foods
+        self.names = list(foods.keys())
+
+        # Bounded memo of name -> matched food name; lives as long as this index,
+        # so rebuilding the matcher for a new foodkeeper.json also clears it
+        self._memo = lru_cache(maxsize=memo_size)(self._match_name)
+
+        # Substring lookups: a food name inside the item starts with one of the
+        # item's trigrams, and an item inside a food name shares its first trigram.
+        # Fuzzy lookups: padded trigram -> foods containing it, plus per-food
+        # length and character counts for bounding ratio() without computing it
+        self.index = index if index is not None else NameIndex(self.names)
+        self._char_counts = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def substring_match(self, item_lower):
+        """First food (in database order) that contains, or is contained by, the item"""
+        if len(item_lower) < 3:
+            candidates = range(len(self.names))
+        else:
+            # Names under 3 characters have no first trigram
+            candidates = set()
+            for length in range(3):
+                candidates.update(self.index.postings('length', length))
+            for gram in _trigrams(item_lower):
+                candidates.update(self.index.postings('first', gram))
+            candidates.update(self.index.postings('gram', item_lower[:3]))
+            candidates = sorted(candidates)
+
+        for idx in candidates:
+            food_name = self.names[idx]
+            if food_name in item_lower or item_lower in food_name:
+                return food_name
+        return None
+
+    def fuzzy_candidates(self, item_lower):
+        """Foods sharing at least one padded trigram with the item, in database order"""
+        candidates = set()
+        for gram in _padded_trigrams(item_lower):
+            candidates.update(self.index.postings('padded', gram))
+        return sorted(candidates)
+
+    def _remaining_candidates(self, item_len, shortlist, best_score):
+        """Foods outside the shortlist whose length still allows beating best_score"""
+        lengths = self.index.lengths()
+        if best_score > 0:
+            # 2*min(a, b)/(a + b) > best_score bounds the food name length
+            low = best_score * item_len / (2 - best_score)
+            high = item_len * (2 - best_score) / best_score
+            lengths = [length for length in lengths if low <= length <= high]
+
+        remaining = []
+        for length in lengths:
+            remaining.extend(idx for idx in self.index.postings('length', length) if idx not in shortlist)
+        return sorted(remaining)
+
+    def best_fuzzy_match(self, item_lower, threshold):
+        """Highest SequenceMatcher ratio above threshold, same result as a full scan"""
+        best_idx = None
+        best_score = threshold
+        matcher = SequenceMatcher(None, item_lower)
+        item_len = len(item_lower)
+        item_counts = Counter(item_lower)
+
+        def beats_best(idx):
+            nonlocal best_idx, best_score
+            food_name = self.names[idx]
+            total_len = item_len + len(food_name)
+            if not total_len:
+                return
+
+            # Ties go to the food listed first, like the original linear scan
+            def better(score):
+                return score > best_score or (
+                    best_idx is not None and score == best_score and idx < best_idx)
+
+            # ratio() is bounded by the length ratio and by shared character counts
+            if not better(2.0 * min(item_len, len(food_name)) / total_len):
+                return
+            food_counts = self._char_counts.get(idx)
+            if food_counts is None:
+                food_counts = self._char_counts[idx] = Counter(food_name)
+            shared = sum(min(count, food_counts[char]) for char, count in item_counts.items())
+            if not better(2.0 * shared / total_len):
+                return
+
+            matcher.set_seq2(food_name)
+            score = matcher.ratio()
+            if better(score):
+                best_score = score
+                best_idx = idx
+
+        # Score the trigram shortlist first so the bounds above prune the rest
+        shortlist = self.fuzzy_candidates(item_lower)
+        for idx in shortlist:
+            beats_best(idx)
+        for idx in self._remaining_candidates(item_len, set(shortlist), best_score):
+            beats_best(idx)
+
+        return self.names[best_idx] if best_idx is not None else None
+
+    def _match_name(self, item_lower, threshold):
+        food_name = self.substring_match(item_lower)
+        if food_name is None:
+            food_name = self.best_fuzzy_match(item_lower, threshold)
+        return food_name
+
+    def match(self, item_lower, threshold=0.6):
+        """Substring match wins first, then the best fuzzy match above threshold"""
+        food_name = self._memo(item_lower, threshold)
+        return self.foods.get(food_name) if food_name else None
+
+    def match_many(self, item_names, threshold=0.6):
+        """Match a batch of raw names, looking up each distinct normalized name once"""
+        normalized = {}
+        for name in item_names:
+            if name not in normalized:
+                normalized[name] = normalize_name(name)
+
+        matches = {}
+        for item_lower in set(normalized.values()):
+            matches[item_lower] = self.match(item_lower, threshold)
+
+        return [matches[normalized[name]] for name in item_names]
+
+    def memo_stats(self):
+        """Hit/miss counters of the match memo"""
+        info = self._memo.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
+
+    def clear_memo(self):
+        """Forget memoized matches (benchmarks measure cold matching with this)"""
+        self._memo.cache_clear()
@@ -0,0 +1,118 @@
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PIL import Image
+
+from .adaptive import ADAPTIVE_SETTINGS, adaptive_image_to_string
+from .config import OCR_MODE, OCR_WORKERS
+from .engine import get_ocr_engine
+from .layout import ROI_SETTINGS, crop_text_rows
+from .preprocess import PREPROCESS_SETTINGS, preprocess_image
+from .timing import NULL_TIMER
+
+# Extra command-line flags passed to Tesseract
+TESSERACT_CONFIG = ''
+
+def read_image_bytes(img_file):
+    """Raw bytes of an uploaded file or a path on disk"""
+    if hasattr(img_file, 'getvalue'):
+        return img_file.getvalue()
+    with open(img_file, 'rb') as f:
+        return f.read()
+
+def decode_image(image_bytes):
+    """Full-resolution image, decoded here on the OCR worker and dropped once it is read"""
+    image = Image.open(io.BytesIO(image_bytes))
+    image.load()
+    return image
+
+def ocr_image(img_file, preprocess=True, cache=None, timer=NULL_TIMER, engine=None, roi=False,
+              mode=None, line_ok=None):
+    """Open a single uploaded image and run Tesseract on it (only its text rows with roi)"""
+    engine = engine or get_ocr_engine()
+    # 'adaptive' reads a half-size copy, then re-reads the lines Tesseract is unsure of
+    # or line_ok(line) rejects; 'full' reads the whole image once
+    mode = mode or OCR_MODE
+    if mode not in ('full', 'adaptive'):
+        raise ValueError(f"Unknown OCR mode: {mode}")
+    
+    timer.count('images')
+    with timer.stage('read'):
+        image_bytes = read_image_bytes(img_file)
+    
+    # Same bytes + same settings = same text, so skip Tesseract entirely
+    if cache is not None:
+        settings = {'preprocess': preprocess, 'tesseract_config': TESSERACT_CONFIG,
+                    'engine': engine.name}
+        if preprocess:
+            settings.update(PREPROCESS_SETTINGS)
+        if roi:
+            settings['roi'] = ROI_SETTINGS
+        if mode == 'adaptive':
+            settings['adaptive'] = dict(ADAPTIVE_SETTINGS, line_ok=getattr(line_ok, '__name__', None))
+        key = cache.make_key(image_bytes, settings)
+        with timer.stage('cache'):
+            text = cache.get(key)
+        if text is not None:
+            timer.count('cache_hits')
+            return text
+        timer.count('cache_misses')
+    
+    with timer.stage('decode'):
+        image = decode_image(image_bytes)
+    if preprocess:
+        with timer.stage('preprocess'):
+            image = preprocess_image(image)
+    if roi:
+        with timer.stage('roi'):
+            image = crop_text_rows(image)
+    with timer.stage('ocr'):
+        if mode == 'adaptive':
+            text = adaptive_image_to_string(image, engine, config=TESSERACT_CONFIG, line_ok=line_ok,
+                                            timer=timer)
+        else:
+            text = engine.image_to_string(image, config=TESSERACT_CONFIG)
+    
+    if cache is not None:
+        cache.put(key, text)
+    return text
+
+def iter_ocr_images(img_files, preprocess=True, workers=None, on_progress=None, cache=None,
+                    timer=NULL_TIMER, engine=None, roi=False, mode=None, line_ok=None):
+    """OCR several images in parallel, yielding each text in upload order as soon as it is ready"""
+    img_files = list(img_files)
+    if not img_files:
+        return
+    
+    workers = max(1, min(workers or OCR_WORKERS, len(img_files)))
+    engine = engine or get_ocr_engine()
+    
+    # Tesseract runs as a subprocess or releases the GIL (tesserocr), so threads
+    # are enough to keep every core busy
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(ocr_image, img_file, preprocess, cache, timer, engine, roi,
+                                   mode, line_ok): idx
+                   for idx, img_file in enumerate(img_files)}
+        
+        # Finished texts wait here until every earlier upload is done too;
+        # progress is reported from this thread
+        ready = {}
+        next_idx = 0
+        for done, future in enumerate(as_completed(futures), start=1):
+            ready[futures[future]] = future.result()
+            if on_progress:
+                on_progress(done, len(img_files))
+            
+            while next_idx in ready:
+                yield ready.pop(next_idx)
+                next_idx += 1
+    finally:
+        # A caller that stops early (cancelled scan, error) shouldn't wait on images nobody will read
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def ocr_images(img_files, preprocess=True, workers=None, on_progress=None, cache=None,
+               timer=NULL_TIMER, engine=None, roi=False, mode=None, line_ok=None):
+    """OCR several images in parallel - texts come back in upload order"""
+    return list(iter_ocr_images(img_files, preprocess, workers, on_progress, cache, timer, engine, roi,
+                                mode, line_ok))
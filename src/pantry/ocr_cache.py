@@ -0,0 +1,97 @@
+import hashlib
+import os
+import threading
+
+
+class OCRCache:
+    """On-disk cache of OCR text keyed by image bytes + OCR settings"""
+
+    def __init__(self, directory, max_entries=500, max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(image_bytes, settings):
+        """Hash the raw upload together with everything that changes the OCR output"""
+        digest = hashlib.sha256(image_bytes)
+        for name in sorted(settings):
+            digest.update(f"\0{name}={settings[name]!r}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def get(self, key):
+        """Return cached text or None, refreshing the entry's LRU position on a hit"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key, text):
+        """Store OCR text and evict least recently used entries past the limits"""
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.txt'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        entries.sort()
+
+        # Oldest access time first
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, name = entries.pop(0)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total_bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            for name in os.listdir(self.directory):
+                if name.endswith('.txt'):
+                    os.remove(os.path.join(self.directory, name))
+
+    def stats(self):
+        """Hit/miss counters for display"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
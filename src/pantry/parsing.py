@@ -0,0 +1,441 @@
+import re
+from difflib import SequenceMatcher
+
+# Walmart line classes - each keyword maps to the checks it used to feed
+WALMART_SKIP = 1          # not a grocery item
+WALMART_TOTAL = 2         # order totals (tax, subtotal, ...)
+WALMART_DETAIL_BEFORE = 4 # unit/qty lines that are never part of an item name
+WALMART_DETAIL_AFTER = 8  # unit/variant lines allowed between a price and its qty
+
+WALMART_KEYWORDS = {}
+for keywords, flag in [
+    (['delivered', 'items received', 'weight-adjusted', 'shopped', 'review item',
+      'return eligible', 'delivery from', 'final weight', 'subtotal', 'driver tip',
+      'payment method', 'temporary hold', 'ending in', 'charge history',
+      'wove', 'congratulations', 'track order', 'contact', 'unavailable', 'how can we help',
+      'start a return', 'transaction activity', 'order#', 'your payment', 'charge',
+      'free delivery', 'sponsored'], WALMART_SKIP),
+    (['tax', 'total', 'subtotal', 'driver tip'], WALMART_TOTAL),
+    (['/lb', '/oz', '/fl', '/ea', 'multipack', 'qty'], WALMART_DETAIL_BEFORE),
+    (['/lb', '/oz', '/fl', '/ea', 'flavor:', 'size:', 'final weight', 'multipack'], WALMART_DETAIL_AFTER),
+]:
+    for keyword in keywords:
+        WALMART_KEYWORDS[keyword] = WALMART_KEYWORDS.get(keyword, 0) | flag
+
+# A longer keyword shadows any keyword that is its prefix at the same position,
+# so it carries that keyword's flags too
+WALMART_KEYWORD_FLAGS = {
+    keyword: flags | sum({other_flags for other, other_flags in WALMART_KEYWORDS.items()
+                          if keyword.startswith(other)}, 0)
+    for keyword, flags in WALMART_KEYWORDS.items()
+}
+
+# Zero-width lookahead so overlapping keywords ("subtotal"/"total") are all seen
+WALMART_KEYWORD_PATTERN = re.compile('(?=(' + '|'.join(
+    re.escape(keyword) for keyword in sorted(WALMART_KEYWORD_FLAGS, key=len, reverse=True)) + '))')
+WALMART_PRICE_PATTERN = re.compile(r'\$(\d+[\.\s]\d{2})')
+WALMART_QTY_PATTERN = re.compile(r'qty\s*(\d+)')
+
+def walmart_line_ok(raw_line):
+    """False for a line that has a price or qty the Walmart parser can't read (likely misread)"""
+    line = raw_line.strip()
+    if '$' in line and not WALMART_PRICE_PATTERN.search(line):
+        return False
+    line_lower = line.lower()
+    return 'qty' not in line_lower or WALMART_QTY_PATTERN.search(line_lower) is not None
+
+def classify_walmart_line(raw_line):
+    """Classify one OCR line in a single pass: (line, lower, flags, price match, qty match)"""
+    line = raw_line.strip()
+    line_lower = line.lower()
+    flags = 0
+    if line_lower:
+        for keyword in WALMART_KEYWORD_PATTERN.findall(line_lower):
+            flags |= WALMART_KEYWORD_FLAGS[keyword]
+    return (line, line_lower, flags,
+            WALMART_PRICE_PATTERN.search(line), WALMART_QTY_PATTERN.search(line_lower))
+
+def iter_text_lines(texts):
+    """Lines of several OCR texts in order, same as '\\n'.join(texts).split('\\n')"""
+    for text in texts:
+        yield from text.split('\n')
+
+# Scrolling screenshots share at least this many (non-blank) lines to count as overlapping
+MIN_OVERLAP_LINES = 2
+
+# Price, qty and unit lines repeat from item to item, so an overlap made of nothing
+# else is only trusted when it is longer
+MIN_GENERIC_OVERLAP_LINES = 4
+GENERIC_LINE_PATTERN = re.compile(r'(?:[\s\d$.,/@:x-]|qty|lb|oz|fl|ea|ct)*')
+
+# Lines at a screenshot's top/bottom edge that may be a half-visible, misread row.
+# They are skipped only when the rest of the overlap is at least MIN_TRIMMED_OVERLAP_LINES
+OVERLAP_EDGE_LINES = 1
+MIN_TRIMMED_OVERLAP_LINES = 3
+
+# A skipped last row is dropped only when the next screenshot's row after the overlap
+# reads like the whole of it
+MIN_EDGE_LINE_RATIO = 0.6
+
+_HASH_BASE = 1000003
+_HASH_MOD = (1 << 61) - 1
+
+def key_lines(lines):
+    """(indexes of the non-blank lines, their normalized keys, their prefix hashes once needed)"""
+    indexes, keys = [], []
+    for idx, line in enumerate(lines):
+        key = ' '.join(line.lower().split())
+        if key:
+            indexes.append(idx)
+            keys.append(key)
+    return indexes, keys, []
+
+def _prefix_hashes(keyed):
+    """Rolling hashes of every prefix of keyed's keys, computed on first use"""
+    _, keys, hashes = keyed
+    if not hashes:
+        running = 0
+        hashes.append(running)
+        for key in keys:
+            running = (running * _HASH_BASE + hash(key)) % _HASH_MOD
+            hashes.append(running)
+    return hashes
+
+def _overlap_length(prev, nxt, end, start, min_overlap):
+    """Longest k with prev keys[end - k:end] == next keys[start:start + k], or 0
+
+    Only positions holding the next run's first key can start an overlap. Each that
+    also lines up on the last key is checked in constant time against the prefix
+    hashes, longest first.
+    """
+    prev_keys = prev[1]
+    next_keys = nxt[1]
+    if start >= len(next_keys):
+        return 0
+    first = next_keys[start]
+    last = prev_keys[end - 1] if end else None
+    pos = max(0, end - (len(next_keys) - start))
+    while True:
+        try:
+            pos = prev_keys.index(first, pos, end - min_overlap + 1)
+        except ValueError:
+            return 0
+        k = end - pos
+        if next_keys[start + k - 1] == last:
+            prev_hashes = _prefix_hashes(prev)
+            next_hashes = _prefix_hashes(nxt)
+            power = pow(_HASH_BASE, k, _HASH_MOD)
+            if ((prev_hashes[end] - prev_hashes[pos] * power) % _HASH_MOD ==
+                    (next_hashes[start + k] - next_hashes[start] * power) % _HASH_MOD
+                    # Rule out hash collisions and runs of generic lines too short to trust
+                    and prev_keys[pos:end] == next_keys[start:start + k]
+                    and (k >= MIN_GENERIC_OVERLAP_LINES or
+                         not all(GENERIC_LINE_PATTERN.fullmatch(key) for key in prev_keys[pos:end]))):
+                return k
+        pos += 1
+
+def find_overlap(prev, nxt, min_overlap=MIN_OVERLAP_LINES, edge_lines=OVERLAP_EDGE_LINES):
+    """(keep prev lines[:cut], resume next lines[start:]) where two screenshots overlap, or None
+
+    prev and nxt are the key_lines of the two screenshots. cut is None when every
+    line of prev is kept.
+    """
+    prev_indexes, prev_keys, _ = prev
+    next_indexes, next_keys, _ = nxt
+
+    # Try skipping a possibly cut-off line at either edge; longest overlap wins
+    best = None
+    for trim_tail in range(min(edge_lines, len(prev_keys)) + 1):
+        for trim_head in range(edge_lines + 1):
+            required = max(min_overlap, MIN_TRIMMED_OVERLAP_LINES) if trim_tail or trim_head else min_overlap
+            k = _overlap_length(prev, nxt, len(prev_keys) - trim_tail, trim_head, required)
+            if k and (best is None or k > best[0]):
+                best = (k, trim_tail, trim_head)
+    if best is None:
+        return None
+
+    k, trim_tail, trim_head = best
+    cut = None
+    if trim_tail:
+        after = trim_head + k
+        dropped = prev_keys[len(prev_keys) - trim_tail:]
+        # Keep the skipped rows unless the next screenshot goes on with the full version
+        if (len(next_keys) >= after + trim_tail and
+                all(SequenceMatcher(None, partial, whole).ratio() >= MIN_EDGE_LINE_RATIO
+                    for partial, whole in zip(dropped, next_keys[after:after + trim_tail]))):
+            cut = prev_indexes[len(prev_keys) - trim_tail]
+    return cut, next_indexes[trim_head + k - 1] + 1
+
+def iter_stitched_lines(texts):
+    """Like iter_text_lines, but rows repeated across overlapping scrolling screenshots appear once"""
+    # Each screenshot is compared whole, even when its top was already covered
+    prev_lines = prev_keyed = None
+    emit_from = 0
+    for text in texts:
+        lines = text.split('\n')
+        keyed = key_lines(lines)
+        start = 0
+        if prev_lines is not None:
+            cut = len(prev_lines)
+            overlap = find_overlap(prev_keyed, keyed)
+            if overlap is not None:
+                cut, start = overlap
+            yield from prev_lines[emit_from:cut]
+        prev_lines, prev_keyed, emit_from = lines, keyed, start
+    if prev_lines is not None:
+        yield from prev_lines[emit_from:]
+
+def iter_walmart_items(lines, totals=None):
+    """Yield Walmart items one at a time from an iterable of OCR lines"""
+    if totals is None:
+        totals = {}
+    
+    # Only a few lines behind and ahead of the current one are ever needed,
+    # so classified lines live in a sliding window instead of a full list
+    source = (classify_walmart_line(line) for line in lines)
+    window = []
+    base = 0
+    
+    def line_at(idx):
+        """Classified line at absolute index idx, or None past the end"""
+        while idx - base >= len(window):
+            classified = next(source, None)
+            if classified is None:
+                return None
+            window.append(classified)
+        return window[idx - base]
+
+    i = 0
+    while line_at(i) is not None:
+        # Drop lines the look-behind can no longer reach
+        if i - base > 64:
+            del window[:i - 3 - base]
+            base = i - 3
+        
+        line, line_lower, flags, price_match, _ = line_at(i)
+        
+        if not line:
+            i += 1
+            continue
+        
+        # Capture order totals
+        if flags & WALMART_TOTAL:
+            if price_match:
+                price = price_match.group(1).replace(' ', '.')
+                if 'tax' in line_lower:
+                    totals['tax'] = f'${price}'
+                elif 'subtotal' in line_lower:
+                    totals['subtotal'] = f'${price}'
+                elif 'driver tip' in line_lower:
+                    totals['driver_tip'] = f'${price}'
+                elif 'total' in line_lower and 'subtotal' not in line_lower:
+                    totals['total'] = f'${price}'
+            i += 1
+            continue
+
+        if flags & WALMART_SKIP:
+            i += 1
+            continue
+        
+        if price_match:
+            price = price_match.group(1).replace(' ', '.')
+            item_name = line[:price_match.start()].strip()
+            
+            # Item names can span multiple lines - look backwards if needed
+            if not item_name or len(item_name) < 2:
+                for back_idx in range(1, min(4, i+1)):
+                    prev_line, _, prev_flags, _, _ = line_at(i-back_idx)
+                    
+                    if prev_flags & (WALMART_SKIP | WALMART_DETAIL_BEFORE | WALMART_TOTAL):
+                        continue
+                    
+                    if item_name:
+                        item_name = prev_line + " " + item_name
+                    else:
+                        item_name = prev_line
+            
+            # Skip if we still don't have a valid item name
+            if not item_name or len(item_name) < 2 or item_name.isdigit() or item_name.startswith('$'):
+                i += 1
+                continue
+            
+            # Look for quantity in the next few lines
+            qty = 1
+            j = i + 1
+            
+            while j < i + 5 and line_at(j) is not None:
+                _, _, next_flags, next_price_match, qty_match = line_at(j)
+                
+                if qty_match:
+                    qty = int(qty_match.group(1))
+                    break
+                
+                if next_flags & WALMART_DETAIL_AFTER:
+                    j += 1
+                    continue
+                
+                if (next_price_match and j > i + 1) or next_flags & WALMART_SKIP:
+                    break
+                
+                j += 1
+            
+            # Filter out obvious fragments
+            word_count = len(item_name.split())
+            if word_count == 1 and len(item_name) < 5:
+                i += 1
+                continue
+            
+            yield {
+                'name': item_name,
+                'price': float(price),
+                'qty': qty
+            }
+            
+            i = j
+            continue
+        
+        i += 1
+
+def parse_walmart_order(texts):
+    """Extract items from Walmart app screenshots - returns raw items without matching"""
+    items = list(iter_walmart_items(iter_stitched_lines(texts)))
+    totals = {'walmart_order': True, 'items_count': len(items)}
+    return items, totals
+
+# Receipt lines that are never items
+RECEIPT_SKIP_WORDS = ['you saved', 'regular price', 'subtotal', 'ending in', 'www.', 'register', 'cashier']
+RECEIPT_TOTAL_PATTERN = re.compile(r'(\d{1,4})\.(\d{2})')
+
+# Pattern 1: Everything on same line with proper decimals
+# "GREEN PEPPER    1.04 @ 1.29  1.34 N"
+RECEIPT_PATTERN_1 = re.compile(r'^(.+?)\s+(\d+\.?\d*)\s*@\s*(\d+\.\d{2})\s+(\d+\.\d{2})\s*[NSTB]', re.IGNORECASE)
+
+# Pattern 2: Everything on same line WITHOUT decimals (OCR missed them)
+# "1.04 @ 129  134N" - need to add decimals
+RECEIPT_PATTERN_2 = re.compile(r'(\d+\.?\d*)\s*@\s*(\d{3,4})\s+(\d{3,4})\s*[NSTB]', re.IGNORECASE)
+
+# Pattern 3: Price line with qty@ format (no item name on this line)
+# "1@ 1299 N" or "2@ 349"
+RECEIPT_PATTERN_3 = re.compile(r'^(\d+)\s*@\s*(\d{3,4})\s*[NSTB]?', re.IGNORECASE)
+
+# Lines with an "@" or ending in a number (and maybe a tax flag) are meant to hold a price
+RECEIPT_PRICE_LINE = re.compile(r'@|\d\s*[NSTB]?$', re.IGNORECASE)
+
+def receipt_line_ok(raw_line):
+    """False for a line that looks like a price but none of the receipt patterns read (likely misread)"""
+    line = raw_line.strip()
+    if not RECEIPT_PRICE_LINE.search(line):
+        return True
+    line_lower = line.lower()
+    if any(word in line_lower for word in RECEIPT_SKIP_WORDS):
+        return True
+    if 'tax' in line_lower or 'total' in line_lower:
+        return RECEIPT_TOTAL_PATTERN.search(line) is not None
+    return any(pattern.search(line) for pattern in (RECEIPT_PATTERN_1, RECEIPT_PATTERN_2, RECEIPT_PATTERN_3))
+
+def iter_receipt_items(lines, totals=None):
+    """Yield physical receipt items one at a time from an iterable of OCR lines"""
+    if totals is None:
+        totals = {}
+    
+    # Patterns 2 and 3 take the item name from the line just before the price
+    prev_raw_line = None
+    
+    for raw_line in lines:
+        line = raw_line.strip()
+        line_lower = line.lower()
+        item_line = prev_raw_line
+        prev_raw_line = raw_line
+        
+        if not line:
+            continue
+        
+        # Skip junk lines
+        if any(word in line_lower for word in RECEIPT_SKIP_WORDS):
+            continue
+        
+        # Capture totals
+        if 'tax' in line_lower and 'total' not in line_lower:
+            price_match = RECEIPT_TOTAL_PATTERN.search(line)
+            if price_match:
+                totals['tax'] = f"${price_match.group(1)}.{price_match.group(2)}"
+            continue
+        
+        if 'total' in line_lower:
+            price_match = RECEIPT_TOTAL_PATTERN.search(line)
+            if price_match:
+                totals['grand_total'] = f"${price_match.group(1)}.{price_match.group(2)}"
+            continue
+        
+        # Pattern 1: Everything on same line with proper decimals
+        match1 = RECEIPT_PATTERN_1.search(line)
+        
+        if match1:
+            item_name = match1.group(1).strip()
+            qty = float(match1.group(2))
+            total_price = float(match1.group(4))
+            
+            # Clean item name
+            item_name = re.sub(r'^\d+\s+', '', item_name)
+            
+            if len(item_name) > 2 and any(c.isalpha() for c in item_name):
+                yield {
+                    'name': item_name,
+                    'price': total_price,
+                    'qty': max(1, int(qty)) if qty >= 1 else 1
+                }
+            continue
+        
+        # Pattern 2: Everything on same line WITHOUT decimals (OCR missed them)
+        match2 = RECEIPT_PATTERN_2.search(line)
+        
+        if match2:
+            qty = float(match2.group(1))
+            total_str = match2.group(3)
+            
+            # Add decimal point
+            total_price = float(f"{total_str[:-2]}.{total_str[-2:]}")
+            
+            # Look for item name in PREVIOUS line
+            if item_line is not None:
+                item_name = item_line.strip()
+                item_name = re.sub(r'^\d+\s+', '', item_name)
+                item_name = re.sub(r'[:\.].*$', '', item_name).strip()
+                
+                if len(item_name) > 2 and any(c.isalpha() for c in item_name):
+                    yield {
+                        'name': item_name,
+                        'price': total_price,
+                        'qty': max(1, int(qty)) if qty >= 1 else 1
+                    }
+            continue
+        
+        # Pattern 3: Price line with qty@ format (no item name on this line)
+        match3 = RECEIPT_PATTERN_3.search(line)
+        
+        if match3:
+            qty = int(match3.group(1))
+            price_str = match3.group(2)
+            
+            # Add decimal
+            total_price = float(f"{price_str[:-2]}.{price_str[-2:]}")
+            
+            # Item name from PREVIOUS line
+            if item_line is not None:
+                item_name = item_line.strip()
+                item_name = re.sub(r'^\d+\s+', '', item_name)
+                item_name = re.sub(r'[:\.].*$', '', item_name).strip()
+                
+                if len(item_name) > 2 and any(c.isalpha() for c in item_name):
+                    yield {
+                        'name': item_name,
+                        'price': total_price,
+                        'qty': qty
+                    }
+            continue
+
+def parse_receipt(text):
+    """Extract items from physical receipt"""
+    totals = {}
+    items = list(iter_receipt_items(text.split('\n'), totals))
+    return items, totals
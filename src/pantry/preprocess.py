@@ -0,0 +1,181 @@
+from PIL import Image, ImageEnhance, ImageFilter
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; fall back to the PIL enhancement chain
+    np = None
+
+from .config import PREPROCESS_ENGINE
+
+# Everything that changes the preprocessed pixels - also part of the OCR cache key
+PREPROCESS_SETTINGS = {
+    'engine': PREPROCESS_ENGINE if np is not None else 'pil',
+    'contrast': 2.0,
+    'sharpness': 2.0,
+    'brightness': 1.2,
+    # 80 mm receipt paper at ~380 DPI; plenty of pixels per text line for Tesseract
+    'max_width': 1200,
+    'crop': True,
+    'deskew': True,
+}
+
+# Side of the thumbnail used to find the receipt and its skew
+ANALYSIS_SIZE = 512
+
+# Skew angles tried by deskew, in degrees - smallest first so level wins ties
+DESKEW_ANGLES = sorted((step / 2 for step in range(-10, 11)), key=abs)
+
+# Tesseract copes with slight skew on its own; only rotate beyond this
+DESKEW_MIN_ANGLE = 1.0
+
+def preprocess_image(image, settings=None):
+    """Enhance image for better OCR"""
+    settings = settings or PREPROCESS_SETTINGS
+    if settings.get('engine') == 'numpy' and np is not None:
+        return preprocess_image_numpy(image, settings)
+    return preprocess_image_pil(image, settings)
+
+def preprocess_image_pil(image, settings=None):
+    """Original three-pass PIL enhancement at full resolution"""
+    settings = settings or PREPROCESS_SETTINGS
+
+    # Convert to grayscale
+    image = image.convert('L')
+
+    # Increase contrast
+    enhancer = ImageEnhance.Contrast(image)
+    image = enhancer.enhance(settings['contrast'])
+
+    # Increase sharpness
+    enhancer = ImageEnhance.Sharpness(image)
+    image = enhancer.enhance(settings['sharpness'])
+
+    # Increase brightness slightly
+    enhancer = ImageEnhance.Brightness(image)
+    image = enhancer.enhance(settings['brightness'])
+
+    return image
+
+def preprocess_image_numpy(image, settings=None):
+    """Crop, downscale and deskew first, then contrast/sharpen/brighten in one fused pass"""
+    settings = settings or PREPROCESS_SETTINGS
+    gray = image.convert('L')
+
+    # Find the receipt and its skew on a small thumbnail
+    if settings.get('crop') or settings.get('deskew'):
+        scale = max(1, max(gray.size) // ANALYSIS_SIZE)
+        thumb = gray.reduce(scale) if scale > 1 else gray
+        thumb_pixels = np.asarray(thumb)
+
+        if settings.get('crop'):
+            left, top, right, bottom = find_receipt_box(thumb_pixels)
+            thumb_pixels = thumb_pixels[top:bottom, left:right]
+            if (right - left, bottom - top) != thumb.size:
+                gray = gray.crop((left * scale, top * scale,
+                                  min(gray.width, right * scale), min(gray.height, bottom * scale)))
+
+        angle = estimate_skew(thumb_pixels) if settings.get('deskew') else 0.0
+    else:
+        angle = 0.0
+
+    # Tesseract gains nothing from pixels beyond the target resolution
+    max_width = settings.get('max_width')
+    if max_width and gray.width > max_width:
+        height = max(1, round(gray.height * max_width / gray.width))
+        gray = gray.resize((max_width, height), Image.BOX)
+
+    # Rotate after downscaling - far fewer pixels to resample
+    if abs(angle) >= DESKEW_MIN_ANGLE:
+        gray = gray.rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+
+    # Contrast as a lookup table around the mean gray level (same blend as ImageEnhance)
+    mean = np.asarray(gray).mean()
+    contrast_lut = [min(255, max(0, round(mean + settings['contrast'] * (level - mean))))
+                    for level in range(256)]
+    contrasted = gray.point(contrast_lut)
+    smoothed = contrasted.filter(ImageFilter.SMOOTH)
+
+    # Sharpen against the SMOOTH kernel and brighten - both linear, so one fused expression
+    contrasted = np.asarray(contrasted, dtype=np.float32)
+    smoothed = np.asarray(smoothed, dtype=np.float32)
+    sharpened = smoothed + settings['sharpness'] * (contrasted - smoothed)
+    result = np.clip(np.rint(sharpened * settings['brightness']), 0, 255).astype(np.uint8)
+
+    return Image.fromarray(result)
+
+def otsu_threshold(pixels):
+    """Gray level that best separates paper from background/ink"""
+    hist = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if not total:
+        return 128
+    weight_dark = np.cumsum(hist)
+    weight_light = total - weight_dark
+    cumulative_mean = np.cumsum(hist * np.arange(256))
+    mean_dark = cumulative_mean / np.maximum(weight_dark, 1)
+    mean_light = (cumulative_mean[-1] - cumulative_mean) / np.maximum(weight_light, 1)
+    between = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+    return int(np.argmax(between))
+
+def _longest_run(mask):
+    """(start, end) of the longest run of True values, or None"""
+    best = None
+    start = None
+    for idx, value in enumerate(list(mask) + [False]):
+        if value and start is None:
+            start = idx
+        elif not value and start is not None:
+            if best is None or idx - start > best[1] - best[0]:
+                best = (start, idx)
+            start = None
+    return best
+
+def find_receipt_box(pixels, min_fraction=0.4, min_area=0.15):
+    """Bounding box (left, top, right, bottom) of the bright paper, or the whole image"""
+    height, width = pixels.shape
+    whole = (0, 0, width, height)
+    if not height or not width:
+        return whole
+
+    paper = pixels > otsu_threshold(pixels)
+
+    # Receipt columns are mostly paper even where there is text on them
+    cols = _longest_run(paper.mean(axis=0) > min_fraction)
+    if cols is None:
+        return whole
+    rows = _longest_run(paper[:, cols[0]:cols[1]].mean(axis=1) > min_fraction)
+    if rows is None:
+        return whole
+
+    # Small margin so characters touching the paper edge survive
+    pad_x = max(1, width // 100)
+    pad_y = max(1, height // 100)
+    left, right = max(0, cols[0] - pad_x), min(width, cols[1] + pad_x)
+    top, bottom = max(0, rows[0] - pad_y), min(height, rows[1] + pad_y)
+
+    # Nothing sensible found (or it is already just the receipt) - keep everything
+    if (right - left) * (bottom - top) < min_area * width * height:
+        return whole
+    return (left, top, right, bottom)
+
+def estimate_skew(pixels):
+    """Rotation (degrees) that makes text rows most horizontal, by projection profile"""
+    ys, xs = np.nonzero(pixels < otsu_threshold(pixels)) if pixels.size else ((), ())
+    if not len(ys):
+        return 0.0
+
+    best_angle = 0.0
+    best_score = None
+    for angle in DESKEW_ANGLES:
+        # For a few degrees a rotation is close enough to a vertical shear, which
+        # turns each candidate profile into a single bincount over the ink pixels
+        shift = np.rint(xs * np.tan(np.radians(angle))).astype(np.int64)
+        rows = ys - shift
+        profile = np.bincount(rows - rows.min()).astype(np.float64)
+
+        # Sharp peaks/valleys between text rows mean the rows are level
+        score = float(np.square(np.diff(profile)).sum())
+        if best_score is None or score > best_score:
+            best_score = score
+            best_angle = angle
+    return best_angle
@@ -0,0 +1,151 @@
+import cProfile
+import os
+import pstats
+import shutil
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from .config import PROFILE_KEEP
+
+# Functions and allocation sites kept in a profile summary and report
+PROFILE_TOP_N = 25
+
+# Allocation sites are grouped by the line that allocated, so one frame per trace is enough
+TRACE_FRAMES = 1
+
+# Allocations made by the profiling machinery itself
+_IGNORED = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, pstats.__file__),
+    tracemalloc.Filter(False, '<frozen *>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+# tracemalloc is process-wide: the first profile to start turns it on, the last one off.
+# Each start resets the traced peak, so the profiles running then keep what it had reached
+_tracing = {'profilers': set(), 'started_here': False}
+_tracing_lock = threading.Lock()
+
+
+def _start_tracing(profiler):
+    """Traced memory when profiler starts, with the peak reset to it"""
+    with _tracing_lock:
+        if not _tracing['profilers']:
+            _tracing['started_here'] = not tracemalloc.is_tracing()
+            if _tracing['started_here']:
+                tracemalloc.start(TRACE_FRAMES)
+        current, peak = tracemalloc.get_traced_memory()
+        for other in _tracing['profilers']:
+            other._peak = max(other._peak, peak)
+        tracemalloc.reset_peak()
+        profiler._peak = current
+        _tracing['profilers'].add(profiler)
+        return current
+
+
+def _stop_tracing(profiler):
+    """Highest traced memory since profiler started"""
+    with _tracing_lock:
+        _tracing['profilers'].discard(profiler)
+        peak = max(profiler._peak, tracemalloc.get_traced_memory()[1])
+        if not _tracing['profilers'] and _tracing['started_here']:
+            tracemalloc.stop()
+        return peak
+
+
+def new_profile_dir(root, keep=PROFILE_KEEP):
+    """A fresh timestamped folder path under root, after deleting all but the newest keep - 1 there"""
+    try:
+        folders = [entry for entry in os.scandir(root) if entry.is_dir()]
+    except OSError:
+        folders = []
+    folders.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in folders[max(keep - 1, 0):]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+    return os.path.join(root, datetime.now().strftime('%Y%m%d-%H%M%S-%f'))
+
+
+def _function_name(func):
+    filename, line, name = func
+    if filename == '~':  # built-in
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+class Profiler:
+    """cProfile (this thread) and tracemalloc (all threads) around a block, saved as <name>.prof and <name>.alloc.txt"""
+
+    def __init__(self, directory, name, top_n=PROFILE_TOP_N):
+        self.directory = directory
+        self.name = name
+        self.top_n = top_n
+        self.summary = None
+        self._peak = 0
+
+    @property
+    def profile_path(self):
+        return os.path.join(self.directory, f"{self.name}.prof")
+
+    @property
+    def allocations_path(self):
+        return os.path.join(self.directory, f"{self.name}.alloc.txt")
+
+    def __enter__(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._start_traced = _start_tracing(self)
+        self._before = tracemalloc.take_snapshot()
+        self._profile = cProfile.Profile()
+        self._started = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profile.disable()
+        seconds = time.perf_counter() - self._started
+        try:
+            after = tracemalloc.take_snapshot()
+        finally:
+            peak = _stop_tracing(self)
+        # Memory already traced when the block started doesn't count towards its peak
+        self.summary = self._save(seconds, after, max(peak - self._start_traced, 0))
+        return False
+
+    def _save(self, seconds, after, peak):
+        # The folder may have been pruned meanwhile by new_profile_dir
+        os.makedirs(self.directory, exist_ok=True)
+        self._profile.dump_stats(self.profile_path)
+
+        stats = pstats.Stats(self._profile).stats
+        slowest = sorted(stats.items(), key=lambda kv: -kv[1][3])[:self.top_n]
+        functions = [
+            {'function': _function_name(func), 'calls': calls, 'own_seconds': own, 'cumulative_seconds': cumulative}
+            for func, (_, calls, own, cumulative, _) in slowest
+        ]
+
+        # Net allocations while profiling, biggest first (memory freed again doesn't show)
+        growth = after.filter_traces(_IGNORED).compare_to(self._before.filter_traces(_IGNORED), 'lineno')
+        growth = [stat for stat in growth if stat.size_diff > 0][:self.top_n]
+        allocations = [
+            {'where': f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+             'kib': stat.size_diff / 1024, 'blocks': stat.count_diff}
+            for stat in growth
+        ]
+        with open(self.allocations_path, 'w', encoding='utf-8') as f:
+            f.write(f"{self.name}: {seconds:.3f}s, traced peak {peak / 1024:.1f} KiB "
+                    "above the start (all threads)\n")
+            f.write(f"Top {len(growth)} allocation sites by memory still held at the end:\n\n")
+            for stat in growth:
+                f.write(f"{stat}\n")
+
+        return {
+            'name': self.name,
+            'directory': self.directory,
+            'seconds': seconds,
+            'peak_kib': peak / 1024,
+            'profile_path': self.profile_path,
+            'allocations_path': self.allocations_path,
+            'functions': functions,
+            'allocations': allocations,
+        }
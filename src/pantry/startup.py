@@ -0,0 +1,48 @@
+import logging
+import threading
+import time
+
+from .engine import resolve_engine
+from .foodkeeper import get_foodkeeper
+from .tesseract import find_tesseract
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_foodkeeper():
+    foods, _ = get_foodkeeper()
+    return {'foods': len(foods)}
+
+
+def _warm_tesseract():
+    # Only the binary needs finding; tesserocr (in-process or in workers) brings its own Tesseract
+    engine = resolve_engine()
+    if engine != 'subprocess':
+        return {'engine': engine}
+    return dict(find_tesseract(), engine=engine)
+
+
+# Run in this order: matching needs FoodKeeper, scanning needs Tesseract
+WARMUP_STEPS = [('foodkeeper', _warm_foodkeeper), ('tesseract', _warm_tesseract)]
+
+
+def start_warmup(steps=WARMUP_STEPS):
+    """Daemon thread that gets first-use work done early: the FoodKeeper index and the Tesseract lookup"""
+    results = {}
+
+    def run():
+        for name, step in steps:
+            started = time.perf_counter()
+            try:
+                result = step()
+            except Exception as e:
+                logger.warning("Warm-up step %s failed: %s", name, e)
+                result = {'error': str(e)}
+            result['seconds'] = time.perf_counter() - started
+            results[name] = result
+
+    thread = threading.Thread(target=run, name='warmup', daemon=True)
+    # Each step's outcome (and time taken) lands here as soon as it finishes
+    thread.results = results
+    thread.start()
+    return thread
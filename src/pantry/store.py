@@ -0,0 +1,141 @@
+import threading
+from datetime import date, timedelta
+
+from .db import connect, init_db
+from .expiry import ExpiryCalendar
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pantry_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    qty INTEGER NOT NULL DEFAULT 1,
+    price REAL,
+    category TEXT NOT NULL DEFAULT 'unknown',
+    storage_location TEXT NOT NULL,
+    purchased_at TEXT NOT NULL,
+    expiry_date TEXT NOT NULL,
+    tips TEXT,
+    receipt_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pantry_expiry ON pantry_items (expiry_date);
+CREATE INDEX IF NOT EXISTS idx_pantry_location ON pantry_items (storage_location, expiry_date);
+CREATE INDEX IF NOT EXISTS idx_pantry_category ON pantry_items (category);
+"""
+
+COLUMNS = ['id', 'name', 'qty', 'price', 'category', 'storage_location',
+           'purchased_at', 'expiry_date', 'tips', 'receipt_id']
+
+
+class PantryStore:
+    """SQLite (WAL mode) store of saved pantry items"""
+
+    def __init__(self, path):
+        self.path = path
+        self._calendar = None
+        self._calendar_lock = threading.Lock()
+        init_db(path, SCHEMA)
+
+    @staticmethod
+    def _parse_price(price):
+        if isinstance(price, str):
+            price = price.replace('$', '').strip()
+        try:
+            return float(price)
+        except (TypeError, ValueError):
+            return None
+
+    def add_items(self, items, purchased_at=None, receipt_id=None):
+        """Insert a whole receipt's worth of organized items in one transaction"""
+        purchased_at = purchased_at or date.today()
+        rows = []
+        for item in items:
+            if item['storage_location'] not in ('fridge', 'shelf'):
+                continue
+            expiry_date = purchased_at + timedelta(days=item['expiry_days'])
+            rows.append((
+                item['name'],
+                item.get('qty', 1),
+                self._parse_price(item.get('price')),
+                item.get('category', 'unknown'),
+                item['storage_location'],
+                purchased_at.isoformat(),
+                expiry_date.isoformat(),
+                item.get('tips'),
+                receipt_id,
+            ))
+
+        # Row by row inside the one transaction, to learn each new id for the calendar
+        saved = []
+        with connect(self.path) as conn:
+            for row in rows:
+                cursor = conn.execute(
+                    'INSERT INTO pantry_items (name, qty, price, category, storage_location, '
+                    'purchased_at, expiry_date, tips, receipt_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    row)
+                saved.append(dict(zip(COLUMNS, (cursor.lastrowid,) + row)))
+
+        calendar = self._calendar
+        if calendar is not None:
+            for item in saved:
+                calendar.add(item)
+        return len(saved)
+
+    def calendar(self):
+        """In-memory expiry calendar of every saved item, kept in step with later writes"""
+        with self._calendar_lock:
+            if self._calendar is None:
+                self._calendar = ExpiryCalendar(self.items())
+            return self._calendar
+
+    def _query(self, sql, params=()):
+        with connect(self.path) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def expiring_within(self, days, today=None, storage_location=None):
+        """Items whose expiry date falls in the next `days` days (already expired included)"""
+        today = today or date.today()
+        cutoff = (today + timedelta(days=days)).isoformat()
+        sql = f"SELECT {', '.join(COLUMNS)} FROM pantry_items WHERE expiry_date <= ?"
+        params = [cutoff]
+        if storage_location:
+            sql += ' AND storage_location = ?'
+            params.append(storage_location)
+        return self._query(sql + ' ORDER BY expiry_date, id', params)
+
+    def items(self, storage_location=None, category=None):
+        """All saved items, soonest expiry first"""
+        sql = f"SELECT {', '.join(COLUMNS)} FROM pantry_items"
+        clauses = []
+        params = []
+        if storage_location:
+            clauses.append('storage_location = ?')
+            params.append(storage_location)
+        if category:
+            clauses.append('category = ?')
+            params.append(category)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        return self._query(sql + ' ORDER BY expiry_date, id', params)
+
+    def move(self, item_id, storage_location, expiry_date):
+        """Move a saved item (e.g. shelf to fridge once opened) with its new expiry date"""
+        with connect(self.path) as conn:
+            conn.execute('UPDATE pantry_items SET storage_location = ?, expiry_date = ? WHERE id = ?',
+                         (storage_location, expiry_date.isoformat(), item_id))
+            row = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM pantry_items WHERE id = ?",
+                               (item_id,)).fetchone()
+        if row is not None and self._calendar is not None:
+            self._calendar.add(dict(zip(COLUMNS, row)))
+
+    def remove(self, item_id):
+        """Delete an item (used up or thrown out)"""
+        with connect(self.path) as conn:
+            conn.execute('DELETE FROM pantry_items WHERE id = ?', (item_id,))
+        if self._calendar is not None:
+            self._calendar.remove(item_id)
+
+    def count(self):
+        with connect(self.path) as conn:
+            return conn.execute('SELECT COUNT(*) FROM pantry_items').fetchone()[0]
@@ -0,0 +1,99 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+
+from .config import TESSERACT_CMD
+
+# Oldest Tesseract the pipeline runs on: LSTM models, and --psm for adaptive re-reads
+MIN_TESSERACT_VERSION = (4, 0)
+
+# Usual install locations, tried when tesseract isn't on PATH (e.g. the Windows installer)
+KNOWN_PATHS = {
+    'win32': [
+        r'C:\Program Files\Tesseract-OCR\tesseract.exe',
+        r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
+        os.path.expandvars(r'%LOCALAPPDATA%\Programs\Tesseract-OCR\tesseract.exe'),
+    ],
+    'darwin': ['/opt/homebrew/bin/tesseract', '/usr/local/bin/tesseract'],
+    'linux': ['/usr/bin/tesseract', '/usr/local/bin/tesseract'],
+}
+
+VERSION_PATTERN = re.compile(r'tesseract\s+v?((\d+)\.(\d+)\S*)', re.IGNORECASE)
+
+# Found once per process (per explicitly configured command); misses are looked up again
+_found = {}
+_found_lock = threading.Lock()
+
+
+class TesseractNotFound(RuntimeError):
+    pass
+
+
+class TesseractError(RuntimeError):
+    pass
+
+
+def subprocess_args():
+    """Piped output and errors, without a console window flashing up on Windows"""
+    kwargs = {'stdout': subprocess.PIPE, 'stderr': subprocess.PIPE}
+    if hasattr(subprocess, 'STARTUPINFO'):
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+        kwargs['startupinfo'] = startupinfo
+    return kwargs
+
+
+def candidates(cmd=None):
+    """Commands to try in order: the configured one only, else PATH and the usual install locations"""
+    if cmd:
+        return [cmd]
+    found = [shutil.which('tesseract')]
+    platform = 'linux' if sys.platform.startswith('linux') else sys.platform
+    found += [path for path in KNOWN_PATHS.get(platform, []) if os.path.isfile(path)]
+    return list(dict.fromkeys(path for path in found if path))
+
+
+def tesseract_version(cmd, timeout=10):
+    """(major, minor, full version) reported by `cmd --version`, or None when it doesn't run"""
+    try:
+        proc = subprocess.run([cmd, '--version'], timeout=timeout, **subprocess_args())
+    except (OSError, subprocess.SubprocessError):
+        return None
+    # Older builds print the version on stderr
+    output = (proc.stdout + proc.stderr).decode('utf-8', 'replace')
+    match = VERSION_PATTERN.search(output)
+    if not match:
+        return None
+    return int(match.group(2)), int(match.group(3)), match.group(1)
+
+
+def find_tesseract(cmd=None):
+    """Path and version of a usable tesseract binary, checked once per process
+
+    cmd (else PANTRY_TESSERACT_CMD) is the only one tried when given.
+    """
+    cmd = cmd or TESSERACT_CMD
+    with _found_lock:
+        if cmd in _found:
+            return _found[cmd]
+
+        problems = []
+        for path in candidates(cmd):
+            version = tesseract_version(path)
+            if version is None:
+                problems.append(f"{path} did not run")
+            elif version[:2] < MIN_TESSERACT_VERSION:
+                problems.append(f"{path} is Tesseract {version[2]}, older than "
+                                f"{'.'.join(map(str, MIN_TESSERACT_VERSION))}")
+            else:
+                _found[cmd] = {'cmd': path, 'version': version[2]}
+                return _found[cmd]
+
+    if not problems:
+        problems.append("tesseract is not on PATH or in the usual install locations")
+    raise TesseractNotFound(f"No usable Tesseract: {'; '.join(problems)}. "
+                            "Install Tesseract 4 or newer, or set PANTRY_TESSERACT_CMD to its path.")
@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Thread-safe wall-time totals per pipeline stage, plus event counters"""
+
+    def __init__(self):
+        self.totals = {}
+        self.calls = {}
+        self.slowest = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+        self.finished = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            self.calls[stage] = self.calls.get(stage, 0) + 1
+            self.slowest[stage] = max(self.slowest.get(stage, 0.0), seconds)
+
+    def count(self, name, amount=1):
+        """Bump an event counter (images, lines, items, cache hits, ...)"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def stage(self, name):
+        """Time the body of a with-block under `name`, minus stages nested inside it"""
+        # Per-thread stack of time spent in nested stages, so totals never double count
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.add(name, elapsed - nested)
+
+    def timed(self, iterable, name, counter=None):
+        """Yield from iterable, timing each step under `name` (and counting items under counter)"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    value = next(iterator)
+                except StopIteration:
+                    return
+            if counter:
+                self.count(counter)
+            yield value
+
+    def finish(self):
+        """Stop the wall clock"""
+        self.finished = time.perf_counter()
+
+    def to_dict(self):
+        """Stages (seconds, calls, mean/max ms), counters and wall time as plain data"""
+        with self._lock:
+            stages = {
+                stage: {
+                    'seconds': total,
+                    'calls': self.calls[stage],
+                    'mean_ms': 1000 * total / self.calls[stage],
+                    'max_ms': 1000 * self.slowest[stage],
+                }
+                for stage, total in self.totals.items()
+            }
+            counters = dict(self.counters)
+        wall = (self.finished or time.perf_counter()) - self.started
+        return {'wall_seconds': wall, 'stages': stages, 'counters': counters}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix='pantry'):
+        """Prometheus text exposition format"""
+        data = self.to_dict()
+        lines = [
+            f"# TYPE {prefix}_wall_seconds gauge",
+            f"{prefix}_wall_seconds {data['wall_seconds']:.6f}",
+        ]
+        for metric, kind, field, scale in [
+            ('stage_seconds_total', 'counter', 'seconds', 1),
+            ('stage_calls_total', 'counter', 'calls', 1),
+            ('stage_max_seconds', 'gauge', 'max_ms', 0.001),
+        ]:
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for stage, values in data['stages'].items():
+                lines.append(f'{prefix}_{metric}{{stage="{stage}"}} {values[field] * scale:g}')
+        for name, value in data['counters'].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return '\n'.join(lines) + '\n'
+
+    def report(self):
+        """One line per stage: total seconds, call count and mean milliseconds; then the counters"""
+        with self._lock:
+            stages = list(self.totals.items())
+            calls = dict(self.calls)
+            counters = list(self.counters.items())
+
+        lines = []
+        for stage, total in stages:
+            count = calls[stage]
+            lines.append(f"{stage:<12} {total:8.3f}s  {count:6d} calls  {1000 * total / count:9.2f} ms/call")
+        if counters:
+            lines.append('  '.join(f"{name}={value}" for name, value in counters))
+        return '\n'.join(lines)
+
+
+class _NullTimer:
+    """Stand-in used when nobody asked for timings"""
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def add(self, stage, seconds):
+        pass
+
+    def count(self, name, amount=1):
+        pass
+
+    def timed(self, iterable, name, counter=None):
+        return iterable
+
+
+NULL_TIMER = _NullTimer()
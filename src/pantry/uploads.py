@@ -0,0 +1,79 @@
+import io
+import threading
+
+from PIL import Image
+
+from .dedupe import dhash
+
+# Longest side of a preview thumbnail, in pixels (about one preview column on a wide layout)
+THUMBNAIL_SIZE = 480
+THUMBNAIL_QUALITY = 80
+
+
+class Upload:
+    """An uploaded image kept as bytes, plus the small preview its thumbnail and hash come from
+
+    The full-resolution image (about 36 MB for a 12 MP photo) is only decoded by the
+    OCR worker reading it, and freed again once it is read.
+    """
+
+    def __init__(self, data, name=None):
+        self.data = data
+        self.name = name
+        self._preview = None
+        self._thumbnail = None
+        self._dhash = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, uploaded_file):
+        """Wrap a Streamlit UploadedFile (or anything with getvalue())"""
+        return cls(uploaded_file.getvalue(), getattr(uploaded_file, 'name', None))
+
+    def getvalue(self):
+        """Raw bytes, so an Upload goes anywhere an uploaded file does (OCR cache keys included)"""
+        return self.data
+
+    @property
+    def preview(self):
+        """Image shrunk to thumbnail size, made once (previews and hashing start here)"""
+        with self._lock:
+            if self._preview is None:
+                image = Image.open(io.BytesIO(self.data))
+                scale = THUMBNAIL_SIZE / max(image.size)
+                if scale < 1:
+                    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+                    # A JPEG decodes straight at 1/2, 1/4 or 1/8 scale; reducing_gap then shrinks
+                    # by whole factors first, which is much faster on phone photos
+                    image.draft(None, size)
+                    image = image.resize(size, Image.BICUBIC, reducing_gap=2.0)
+                else:
+                    image.load()
+                if image.mode not in ('L', 'RGB'):
+                    image = image.convert('RGB')
+                self._preview = image
+            return self._preview
+
+    def thumbnail(self):
+        """Small JPEG for previews, encoded once"""
+        if self._thumbnail is None:
+            buffer = io.BytesIO()
+            self.preview.save(buffer, format='JPEG', quality=THUMBNAIL_QUALITY)
+            self._thumbnail = buffer.getvalue()
+        return self._thumbnail
+
+    def dhash(self):
+        """Perceptual hash of the image, computed once"""
+        if self._dhash is None:
+            self._dhash = dhash(self.preview)
+        return self._dhash
+
+
+def as_upload(img_file):
+    """Upload for an uploaded file, a path on disk or an Upload already"""
+    if isinstance(img_file, Upload):
+        return img_file
+    if hasattr(img_file, 'getvalue'):
+        return Upload.from_file(img_file)
+    with open(img_file, 'rb') as f:
+        return Upload(f.read(), img_file)
@@ -1,11 +1,15 @@
-import pytesseract
-
-# Set Tesseract path
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+from pantry.engine import load_tesserocr, resolve_engine
+from pantry.tesseract import find_tesseract
 
 try:
-    version = pytesseract.get_tesseract_version()
-    print(f"Tesseract version: {version}")
+    engine = resolve_engine()
+    if engine == 'tesserocr':
+        version = load_tesserocr().tesseract_version().split()[1]
+        print(f"Tesseract version: {version} (tesserocr)")
+    else:
+        # Found on PATH, in the usual install locations or at PANTRY_TESSERACT_CMD
+        tesseract = find_tesseract()
+        print(f"Tesseract version: {tesseract['version']} ({tesseract['cmd']})")
     print("✅ OCR is working!")
 except Exception as e:
     print(f"❌ Error: {e}")
\ No newline at end of file
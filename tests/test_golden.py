@@ -0,0 +1,31 @@
+"""The parsers and FoodKeeper matcher against the golden corpus (see golden/build_corpus.py)"""
+import json
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'src'))
+
+from pantry import fuzzy_match, parse_receipt, parse_walmart_order
+
+def load_cases(name):
+    with open(os.path.join(TESTS_DIR, 'golden', name), encoding='utf-8') as f:
+        return json.load(f)
+
+PARSER_CASES = load_cases('parsers.json')
+MATCH_CASES = load_cases('fuzzy_match.json')
+
+@pytest.mark.parametrize('case', PARSER_CASES, ids=[f"{case['kind']}-{idx}" for idx, case in enumerate(PARSER_CASES)])
+def test_parsers_match_golden(case):
+    parse = parse_walmart_order if case['kind'] == 'walmart' else parse_receipt
+    items, totals = parse(case['input'])
+    # Round-trip through JSON so tuples and lists compare the way they were recorded
+    assert json.loads(json.dumps({'items': items, 'totals': totals})) == case['expected']
+
+def test_fuzzy_match_matches_golden():
+    mismatches = [(case['input'], case['expected'], (fuzzy_match(case['input']) or {}).get('name'))
+                  for case in MATCH_CASES]
+    mismatches = [mismatch for mismatch in mismatches if mismatch[1] != mismatch[2]]
+    assert not mismatches
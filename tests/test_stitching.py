@@ -0,0 +1,34 @@
+"""Stitching overlapping Walmart screenshots (iter_stitched_lines) before parsing"""
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'src'))
+
+from pantry import iter_stitched_lines, iter_text_lines, parse_walmart_order
+
+FIRST = "Great Value Whole Milk $3.48\n$2.50/lb\nQty 1\nBananas Fresh $1.20\nQty 6\nLarge Eggs Dozen $4.12\nQty 2"
+
+def test_overlapping_rows_appear_once():
+    second = "Bananas Fresh $1.20\nQty 6\nLarge Eggs Dozen $4.12\nQty 2\nRoma Tomato $0.98\nQty 3"
+    assert list(iter_stitched_lines([FIRST, second])) == FIRST.split('\n') + ['Roma Tomato $0.98', 'Qty 3']
+    items, _ = parse_walmart_order([FIRST, second])
+    assert [item['name'] for item in items] == ['Great Value Whole Milk', 'Bananas Fresh',
+                                                'Large Eggs Dozen', 'Roma Tomato']
+
+def test_shared_generic_lines_are_not_an_overlap():
+    texts = ["Great Value Whole Milk $3.48\n$2.50/lb\nQty 1\nBanana Bunch Fresh $1.20",
+             "Great Value Wheat Bread $2.00\n$2.50/lb\nQty 1\nLarge Eggs Dozen $4.12\nQty 2"]
+    assert list(iter_stitched_lines(texts)) == list(iter_text_lines(texts))
+    items, _ = parse_walmart_order(texts)
+    assert 'Banana Bunch Fresh' in [item['name'] for item in items]
+
+def test_cut_off_last_row_is_replaced_by_the_full_one():
+    first = FIRST + "\nRoma Tornat $0.9"
+    second = "Bananas Fresh $1.20\nQty 6\nLarge Eggs Dozen $4.12\nQty 2\nRoma Tomato $0.98\nQty 3"
+    assert list(iter_stitched_lines([first, second])) == FIRST.split('\n') + ['Roma Tomato $0.98', 'Qty 3']
+
+def test_skipped_last_row_is_kept_unless_the_next_screenshot_repeats_it():
+    first = FIRST + "\nGala Apple $2.10"
+    second = "Bananas Fresh $1.20\nQty 6\nLarge Eggs Dozen $4.12\nQty 2\nRoma Tomato $0.98\nQty 3"
+    assert list(iter_stitched_lines([first, second])) == first.split('\n') + ['Roma Tomato $0.98', 'Qty 3']